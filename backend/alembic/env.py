@@ -10,12 +10,15 @@ from pathlib import Path
 from app.config import settings
 from app.db.base import Base
 from app.models import Report
+from app.db.urls import sync_database_url
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+# Migrations always run through psycopg2, even if DATABASE_URL names asyncpg
+# (% is doubled because the ini parser treats it as interpolation)
+config.set_main_option("sqlalchemy.url", sync_database_url(settings.DATABASE_URL).replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
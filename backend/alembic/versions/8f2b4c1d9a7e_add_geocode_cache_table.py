@@ -0,0 +1,39 @@
+"""Add geocode_cache table
+
+Revision ID: 8f2b4c1d9a7e
+Revises: 526c582e7fa8
+Create Date: 2026-10-18 10:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2b4c1d9a7e'
+down_revision: Union[str, Sequence[str], None] = '526c582e7fa8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('geocode_cache',
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('found', sa.Boolean(), nullable=False),
+    sa.Column('lat', sa.Float(), nullable=True),
+    sa.Column('lon', sa.Float(), nullable=True),
+    sa.Column('display_name', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_geocode_cache_expires_at'), 'geocode_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_geocode_cache_expires_at'), table_name='geocode_cache')
+    op.drop_table('geocode_cache')
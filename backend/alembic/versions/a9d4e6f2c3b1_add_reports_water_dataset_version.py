@@ -0,0 +1,28 @@
+"""Add water_dataset_version to reports
+
+Revision ID: a9d4e6f2c3b1
+Revises: e7a3f95c1b42
+Create Date: 2026-10-18 14:22:41.318206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d4e6f2c3b1'
+down_revision: Union[str, Sequence[str], None] = 'e7a3f95c1b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('reports', sa.Column('water_dataset_version', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('reports', 'water_dataset_version')
@@ -0,0 +1,37 @@
+"""Add llm_cache table
+
+Revision ID: b3e8c5d1f7a2
+Revises: a9d4e6f2c3b1
+Create Date: 2026-10-18 16:05:12.447903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8c5d1f7a2'
+down_revision: Union[str, Sequence[str], None] = 'a9d4e6f2c3b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('llm_cache',
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_llm_cache_expires_at'), 'llm_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_llm_cache_expires_at'), table_name='llm_cache')
+    op.drop_table('llm_cache')
@@ -0,0 +1,27 @@
+"""Add index on reports.created_at
+
+Revision ID: c41d7e2a5b90
+Revises: 8f2b4c1d9a7e
+Create Date: 2026-10-18 11:03:17.552904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7e2a5b90'
+down_revision: Union[str, Sequence[str], None] = '8f2b4c1d9a7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_reports_created_at'), 'reports', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_reports_created_at'), table_name='reports')
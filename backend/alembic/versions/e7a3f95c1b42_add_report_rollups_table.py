@@ -0,0 +1,62 @@
+"""Add report_rollups table
+
+Revision ID: e7a3f95c1b42
+Revises: c41d7e2a5b90
+Create Date: 2026-10-18 13:26:08.114870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3f95c1b42'
+down_revision: Union[str, Sequence[str], None] = 'c41d7e2a5b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('report_rollups',
+    sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('dimension', sa.String(length=32), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.Column('risk_sum', sa.Float(), nullable=False),
+    sa.Column('risk_count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket_start', 'dimension', 'key')
+    )
+    op.create_index(op.f('ix_report_rollups_bucket_start'), 'report_rollups', ['bucket_start'], unique=False)
+
+    # Backfill from existing reports (same aggregation as app.services.rollups)
+    op.execute("""
+    INSERT INTO report_rollups (bucket_start, dimension, key, count, risk_sum, risk_count)
+    SELECT bucket_start, dimension, key, sum(count), sum(risk_sum), sum(risk_count)
+    FROM (
+        SELECT date_trunc('hour', r.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket_start,
+               d.dimension, d.key, 1 AS count, 0.0 AS risk_sum, 0 AS risk_count
+        FROM reports AS r,
+             LATERAL (VALUES ('total', ''),
+                             ('concern', r.concern),
+                             ('destination', r.destination),
+                             ('skin_type', r.skin_type),
+                             ('hair_type', r.hair_type),
+                             ('duration', r.duration_category)) AS d(dimension, key)
+        WHERE d.key IS NOT NULL
+        UNION ALL
+        SELECT date_trunc('hour', r.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+               'risk', risk.key, 0, risk.value::numeric, 1
+        FROM reports AS r, jsonb_each(r.risks) AS risk(key, value)
+        WHERE r.risks IS NOT NULL AND jsonb_typeof(risk.value) = 'number'
+    ) AS deltas
+    GROUP BY bucket_start, dimension, key
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_report_rollups_bucket_start'), table_name='report_rollups')
+    op.drop_table('report_rollups')
@@ -1,19 +1,19 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ...schemas.inputs import AnalyzeRequest
-from typing import Dict, Any
-from ... services.geocode import geocode_place
-from ...services.clients import open_meteo, openaq
-from ...services.aqi_calculator import calculate_aqi_from_pm25
-from ...services.data_quality import check_data_quality, validate_env_data
-from ...db.session import get_db
-from ...models.report import Report
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from ...schemas.inputs import AnalyzeRequest, AnalyzeBatchRequest
+from typing import Any, AsyncIterator, Dict, Optional
+from ...services.analysis import (
+    REPORT_EVENT,
+    analyze_batch as run_batch,
+    analyze_destination,
+    count_unique_destinations,
+    stream_analysis,
+)
+from ...services.report_writer import report_writer
 from ...config import settings
+from ...core.deadline import request_deadline
+import json
 import logging
-from ...services.clients.water_quality import lookup_water_quality
-from ...services.llm_service import analyze_with_llm
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from fastapi import Request, Response
 from app.core.rate_limiter import limiter
 
@@ -22,177 +22,147 @@ router = APIRouter(
     tags=["analysis"]
 )
 
+
+# /analyze and /analyze/stream run the same pipeline, so they share one quota
+ANALYZE_LIMIT = "10/hour"
+ANALYZE_LIMIT_SCOPE = "analyze"
+
+
+def _deadline_budget(
+    x_request_timeout_ms: Optional[int] = Header(
+        None,
+        ge=1,
+        description="Overall time budget for this request in milliseconds"
+    )
+) -> float:
+    """Seconds the pipeline may take: the client's budget (capped) or ANALYZE_DEADLINE."""
+    if x_request_timeout_ms is None:
+        return settings.ANALYZE_DEADLINE
+    return min(x_request_timeout_ms / 1000, settings.ANALYZE_DEADLINE_MAX)
+
+
 @router.post("/analyze")
-@limiter.limit("10/hour")
-async def analyze(response: Response,request: Request,payload: AnalyzeRequest, db: Session = Depends(get_db)) -> Dict[str, Any]: 
+@limiter.shared_limit(ANALYZE_LIMIT, scope=ANALYZE_LIMIT_SCOPE)
+async def analyze(
+    response: Response,
+    request: Request,
+    payload: AnalyzeRequest,
+    budget: float = Depends(_deadline_budget)
+) -> Dict[str, Any]: 
     """
     Analyze destination and provide skin/hair care recommendations.
-    Saves each analysis to database for model training.
+    Saves each analysis to database for model training (asynchronously,
+    through the report write-behind queue).
+
+    The whole pipeline runs under a deadline (ANALYZE_DEADLINE, or the
+    X-Request-Timeout-Ms header). Stages that don't fit are dropped and
+    listed in data_quality.timed_out_stages.
     """
-    
-    # Step 1: Geocode destination
-    geocode_result = await geocode_place(payload.destination)
-    if geocode_result: 
-        lat = geocode_result["lat"]
-        lon = geocode_result["lon"]
-        coords = {
-            "lat": lat,
-            "lon":  lon,
-            "display_name": geocode_result["display_name"]
-        }
-    else: 
-        lat = lon = None
-        coords = {
-            "lat": None,
-            "lon": None,
-            "display_name": "location not found"
-        }
+    with request_deadline(budget):
+        result, report = await analyze_destination(payload)
 
-    env_report = {"coords": coords}
-
-    # Step 2: Fetch weather + UV
-    if lat is not None and lon is not None: 
-        weather = await open_meteo.fetch_weather_and_uv(lat, lon)
-        if weather:
-            env_report.update({
-                "temperature_c": weather.get("temperature_c"),
-                "humidity":  weather.get("humidity"),
-                "uv_index": weather.get("uv_index")
-            })
-
-        # Step 3: Fetch nearby AQ measurements
-        aqi_data = await openaq.fetch_aqi_nearby(lat, lon)
-        if aqi_data:
-            env_report.update({
-                "aqi": aqi_data.get("us_aqi"),
-                "pm25": aqi_data.get("pm2_5"),
-                "pm10": aqi_data.get("pm10"),
-                "NO2": aqi_data.get("nitrogen_dioxide"),
-                "O3": aqi_data.get("ozone")
-            })
-        
-        # Step 4: Calculate AQI from PM2.5 if API didn't provide it
-        if env_report.get("aqi") is None and env_report.get("pm25") is not None:
-            calculated_aqi = calculate_aqi_from_pm25(env_report["pm25"])
-            if calculated_aqi: 
-                env_report["aqi"] = calculated_aqi
-
-        # Step 4.5: Lookup water quality data
-    water_quality = None
-    if lat is not None and lon is not None:
-        water_quality = lookup_water_quality(
-            city=payload.destination,
-            lat=lat,
-            lon=lon,
-            max_distance_km=100.0
-        )
-        
-        if water_quality: 
-            env_report.update({
-                "water_hardness":  water_quality.get("hardness_mg_l"),
-                "water_ph": water_quality.get("ph"),
-                "water_tds": water_quality.get("tds_mg_l"),
-                "water_chlorine": water_quality.get("chlorine_mg_l"),
-                "water_source":  water_quality.get("source_type"),
-                "water_match_type": water_quality.get("match_type"),
-                "water_distance_km": water_quality.get("distance_km")
-            })
-            logger.info(f"Water quality data:  {water_quality.get('match_type')} match for {payload.destination}")
-        else:
-            logger.warning(f"No water quality data found for {payload.destination}")
-
-    # Step 5: Validate and clean environmental data
-    env_report = validate_env_data(env_report)
-    
-    # Step 6: Check data quality
-    is_mock_data, missing_fields, confidence = check_data_quality(env_report)
-
-    # Step 7: Analyze with Groq LLM
+    # Hand the report to the write-behind queue (persisted off the critical path)
     try:
-        logger.info("Starting LLM-based risk analysis...")
-        
-        llm_result = analyze_with_llm(
-            env_data=env_report,
-            user_profile={
-                'concern': payload.concern,
-                'skin_type':  payload.skin_type,
-                'hair_type': payload.hair_type,
-                'duration_category': payload.duration_category
-            }
-        )
-        
-        risks = llm_result. get('risks', {})
-        recommendations = llm_result.get('recommendations', [])
-        explanations = llm_result.get('explanations', {
-            'why': [
-                f"Environmental analysis completed for {payload.destination}",
-                f"Risk assessment based on current conditions",
-                "Recommendations tailored to your profile"
-            ]
-        })
-        
-        logger.info(f"Risk analysis complete.  Risks: {risks}")
-        
+        await report_writer.submit(report)
     except Exception as e:
-        logger.error(f"Risk analysis failed: {e}")
-        # If everything fails, return basic response
-        risks = {"error": "Unable to calculate risks"}
-        recommendations = ["Please try again later"]
-        explanations = {"why": ["Analysis service temporarily unavailable"]}
+        logger.error(f"Failed to queue report for database: {e}")
+        # Continue even if DB save fails
+
+    return result
+
 
-    # Step 8: Save to database
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _analysis_events(payload: AnalyzeRequest, budget: float) -> AsyncIterator[str]:
+    # The deadline is set here rather than in the endpoint: the body is
+    # produced after the endpoint has returned the StreamingResponse
     try:
-        report = Report(
-            source_version=settings.SOURCE_VERSION,
-            destination=payload.destination,
-            home_city=payload.home_city,
-            duration_category=payload.duration_category,
-            month_or_season=payload.month_or_season,
-            concern=payload.concern,
-            skin_type=payload.skin_type,
-            hair_type=payload.hair_type,
-            destination_lat=coords. get("lat"),
-            destination_lon=coords.get("lon"),
-            destination_display_name=coords.get("display_name"),
-            temperature_c=env_report.get("temperature_c"),
-            humidity=env_report.get("humidity"),
-            uv_index=env_report.get("uv_index"),
-            pm25=env_report.get("pm25"),
-            pm10=env_report.get("pm10"),
-            no2=env_report.get("NO2"),
-            o3=env_report. get("O3"),
-            aqi=env_report.get("aqi"),
-            water_hardness=env_report.get("water_hardness"),
-            water_ph=env_report.get("water_ph"),
-            water_tds=env_report.get("water_tds"),
-            water_chlorine=env_report. get("water_chlorine"),
-            risks=risks,
-            is_mock_data=is_mock_data,
-            missing_fields=missing_fields if missing_fields else None,
-            confidence=confidence
+        with request_deadline(budget):
+            async for event, data in stream_analysis(payload):
+                if event == REPORT_EVENT:
+                    try:
+                        await report_writer.submit(data)
+                    except Exception as e:
+                        logger.error(f"Failed to queue report for database: {e}")
+                    continue
+                yield _sse(event, data)
+    except Exception as e:
+        logger.error(f"Streaming analysis failed for {payload.destination}: {e}")
+        yield _sse("error", {"message": "Analysis failed, please try again later"})
+
+
+@router.post("/analyze/stream")
+@limiter.shared_limit(ANALYZE_LIMIT, scope=ANALYZE_LIMIT_SCOPE)
+async def analyze_stream(
+    response: Response,
+    request: Request,
+    payload: AnalyzeRequest,
+    budget: float = Depends(_deadline_budget)
+) -> StreamingResponse:
+    """
+    Same analysis as /analyze, streamed as Server-Sent Events while each
+    stage finishes: coords, weather, air_quality, water, data_quality,
+    risks, recommendation (one per item, as the LLM writes them),
+    explanations, and complete (the full /analyze response). A fallback
+    event means the LLM answer was replaced by the heuristic one: risks
+    and recommendations that follow it supersede earlier ones. An error
+    event ends a failed stream. Runs under the same deadline as /analyze.
+    """
+    return StreamingResponse(
+        _analysis_events(payload, budget),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop reverse proxies (nginx, Render) from buffering the stream
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+def _charge_batch(request: Request, payload: AnalyzeBatchRequest) -> AnalyzeBatchRequest:
+    """
+    Validate the batch size and price it for the rate limiter, which runs
+    after dependencies: one hit per unique destination.
+    """
+    if len(payload.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can contain at most {settings.BATCH_MAX_ITEMS} items"
         )
-        
-        db.add(report)
-        db.commit()
-        db.refresh(report)
-        
-        logger.info(f"Saved report {report.id} to database")
-        
+    request.state.rate_limit_cost = count_unique_destinations(payload.items)
+    return payload
+
+
+def _batch_cost(request: Request) -> int:
+    return getattr(request.state, "rate_limit_cost", 1)
+
+
+@router.post("/analyze/batch")
+@limiter.limit(settings.BATCH_RATE_LIMIT, cost=_batch_cost)
+async def analyze_batch(
+    response: Response,
+    request: Request,
+    payload: AnalyzeBatchRequest = Depends(_charge_batch)
+) -> Dict[str, Any]:
+    """
+    Analyze an itinerary of destinations in one call.
+    Identical destinations and grid cells share their upstream lookups;
+    each item gets its own result or error, in input order. The reports
+    are queued together and normally land in one bulk insert; if that
+    fails they are written one by one, so a bad item only loses its own
+    report. The whole batch runs under one BATCH_DEADLINE.
+    """
+    with request_deadline(settings.BATCH_DEADLINE):
+        results, reports, summary = await run_batch(payload.items, settings.BATCH_MAX_CONCURRENCY)
+
+    try:
+        await report_writer.submit_many(reports)
     except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to save report to database: {e}")
-        # Continue even if DB save fails
+        logger.error(f"Failed to queue batch reports for database: {e}")
 
-    # Step 9: Return response
     return {
-        "request": payload. dict(),
-        "env_report": env_report,
-        "risks": risks,
-        "recommendations":  recommendations,
-        "explanations":  explanations,
-        "confidence":  confidence,
-        "data_quality":  {
-            "is_mock_data": is_mock_data,
-            "missing_fields": missing_fields
-        }
-    }
\ No newline at end of file
+        "results": results,
+        "summary": summary
+    }
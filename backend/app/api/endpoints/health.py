@@ -1,11 +1,20 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from datetime import datetime
 import os
 import logging
 from ...config import settings
-from app.db.session import get_db
+from app.db.session import get_async_db
+from app.core.singleflight import singleflight_stats
+from app.core.upstream import upstream_stats
+from app.services.geocode_cache import geocode_cache
+from app.services.cache_pruner import cache_pruner
+from app.services.env_cache import env_cache
+from app.services.llm_cache import llm_cache
+from app.services.llm_service import get_llm_queue_stats
+from app.services.report_writer import report_writer
+from app.services.water_reloader import water_reloader
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +22,7 @@ router = APIRouter()
 
 
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     health_status = {
         "status": "healthy",
         "version": "1.0.0",
@@ -23,7 +32,7 @@ async def health_check(db: Session = Depends(get_db)):
     
     # Check database connectivity
     try: 
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         health_status["services"]["database"] = "connected"
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
@@ -37,6 +46,13 @@ async def health_check(db: Session = Depends(get_db)):
         health_status["services"]["groq_api"] = "not_configured"
         health_status["status"] = "degraded"
     
+    health_status["llm"] = get_llm_queue_stats()
+    health_status["report_writer"] = report_writer.stats()
+    health_status["water_dataset"] = water_reloader.stats()
+    
+    # Circuit breakers, retries and the shared retry budget per upstream
+    health_status["upstreams"] = upstream_stats()
+    
     # Check other API keys
     if settings.OPEN_METEO_BASE:
         health_status["services"]["weather_api"] = "configured"
@@ -48,4 +64,14 @@ async def health_check(db: Session = Depends(get_db)):
     else:
         health_status["services"]["air_quality_api"] = "not_configured"
     
+    # Cache effectiveness
+    health_status["caches"] = {
+        "geocode": geocode_cache.stats(),
+        "environment": env_cache.stats(),
+        "llm": llm_cache.stats(),
+        "pruning": cache_pruner.stats()
+    }
+    # Concurrent identical calls that shared one in-flight upstream call
+    health_status["coalescing"] = singleflight_stats()
+    
     return health_status
\ No newline at end of file
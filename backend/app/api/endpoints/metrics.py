@@ -0,0 +1,109 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from typing import Iterable
+import logging
+from app.core.metrics import CONTENT_TYPE, Family, register_collector, render
+from app.core.singleflight import singleflight_stats
+from app.core.upstream import upstream_stats
+from app.db.session import async_engine
+from app.services.env_cache import env_cache
+from app.services.geocode_cache import geocode_cache
+from app.services.llm_cache import llm_cache
+from app.services.llm_service import get_llm_queue_stats
+from app.services.report_writer import report_writer
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+# Collectors: read the counters the services already keep (the same numbers
+# /api/health shows), so nothing is recorded twice on the request path.
+
+def _cache_metrics() -> Iterable[Family]:
+    geocode, environment, llm = geocode_cache.stats(), env_cache.stats(), llm_cache.stats()
+    hits = [
+        ({"cache": "geocode", "tier": "memory"}, geocode["memory"]["hits"]),
+        ({"cache": "geocode", "tier": "db"}, geocode["db_hits"]),
+        ({"cache": "environment", "tier": "fresh"}, environment["hits"]),
+        ({"cache": "environment", "tier": "stale"}, environment["stale_hits"]),
+        ({"cache": "llm", "tier": "memory"}, llm["memory"]["hits"]),
+        ({"cache": "llm", "tier": "db"}, llm["db_hits"]),
+    ]
+    # A memory miss that then hits the DB is counted once, as a DB hit
+    misses = [
+        ({"cache": "geocode"}, geocode["memory"]["misses"] - geocode["db_hits"]),
+        ({"cache": "environment"}, environment["misses"]),
+        ({"cache": "llm"}, llm["memory"]["misses"] - llm["db_hits"]),
+    ]
+    sizes = [
+        ({"cache": "geocode"}, geocode["memory"]["size"]),
+        ({"cache": "environment"}, environment["size"]),
+        ({"cache": "llm"}, llm["memory"]["size"]),
+    ]
+    yield "geodermal_cache_hits_total", "counter", "Cache hits by cache and tier", hits
+    yield "geodermal_cache_misses_total", "counter", "Lookups that missed every tier of the cache", misses
+    yield "geodermal_cache_entries", "gauge", "Entries in the in-memory tier", sizes
+
+
+def _upstream_metrics() -> Iterable[Family]:
+    stats = upstream_stats()
+    providers = stats["providers"]
+
+    def per_provider(read):
+        return [({"provider": name}, read(provider)) for name, provider in providers.items()]
+
+    yield ("geodermal_upstream_requests_total", "counter", "Upstream calls made (excluding retries)",
+           per_provider(lambda p: p["calls"]))
+    yield ("geodermal_upstream_errors_total", "counter", "Upstream attempts that failed with a retryable error",
+           per_provider(lambda p: p["failures"]))
+    yield ("geodermal_upstream_retries_total", "counter", "Upstream retries",
+           per_provider(lambda p: p["retries"]))
+    yield ("geodermal_upstream_hedges_total", "counter", "Hedged duplicate upstream requests",
+           per_provider(lambda p: p["hedges"]))
+    yield ("geodermal_upstream_circuit_rejections_total", "counter", "Calls refused because the circuit was open",
+           per_provider(lambda p: p["circuit"]["rejected"]))
+    yield ("geodermal_upstream_circuit_open", "gauge", "1 while the provider's circuit breaker is not closed",
+           per_provider(lambda p: p["circuit"]["state"] != "closed"))
+    yield ("geodermal_upstream_retry_budget_tokens", "gauge", "Tokens left in the shared retry budget",
+           [({}, stats["retry_budget"]["tokens"])])
+    yield ("geodermal_coalesced_calls_total", "counter", "Calls that joined an identical in-flight call",
+           [({"group": name}, group["coalesced"]) for name, group in singleflight_stats().items()])
+
+
+def _queue_metrics() -> Iterable[Family]:
+    llm = get_llm_queue_stats()
+    yield "geodermal_llm_queue_depth", "gauge", "LLM calls waiting for a concurrency slot", [({}, llm["waiting"])]
+    yield "geodermal_llm_in_flight", "gauge", "LLM calls in progress", [({}, llm["in_flight"])]
+    yield "geodermal_llm_calls_total", "counter", "LLM calls by outcome", [
+        ({"outcome": "completed"}, llm["completed"]),
+        ({"outcome": "timeout"}, llm["timeouts"]),
+        ({"outcome": "error"}, llm["errors"]),
+    ]
+
+    writer = report_writer.stats()
+    yield "geodermal_report_queue_depth", "gauge", "Reports waiting to be written", [({}, writer["queue_depth"])]
+    yield "geodermal_reports_total", "counter", "Reports by persistence outcome", [
+        ({"outcome": "written"}, writer["written"]),
+        ({"outcome": "failed"}, writer["failed"]),
+        ({"outcome": "dropped"}, writer["dropped"]),
+    ]
+
+
+def _db_pool_metrics() -> Iterable[Family]:
+    pool = async_engine.pool
+    yield "geodermal_db_pool_size", "gauge", "Configured connections in the DB pool", [({}, pool.size())]
+    yield "geodermal_db_pool_checked_out", "gauge", "DB connections in use", [({}, pool.checkedout())]
+    yield "geodermal_db_pool_idle", "gauge", "Idle DB connections in the pool", [({}, pool.checkedin())]
+    # Negative until the pool has opened all of its pool_size connections
+    yield "geodermal_db_pool_overflow", "gauge", "Connections opened beyond pool_size", [({}, pool.overflow())]
+
+
+for _collector in (_cache_metrics, _upstream_metrics, _queue_metrics, _db_pool_metrics):
+    register_collector(_collector)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus text format: stage latency histograms plus service counters and gauges."""
+    return Response(content=render(), media_type=CONTENT_TYPE)
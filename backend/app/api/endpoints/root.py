@@ -20,18 +20,38 @@ async def root():
             "analyze": {
                 "method": "POST",
                 "path": "/api/analyze",
-                "description": "Get environmental analysis and personalized recommendations"
+                "description": "Get environmental analysis and personalized recommendations (mode: \"full\" uses the LLM, \"fast\" the heuristic rules)"
+            },
+            "analyze_stream": {
+                "method": "POST",
+                "path": "/api/analyze/stream",
+                "description": "Same as /api/analyze, streamed as Server-Sent Events while each stage finishes"
+            },
+            "analyze_batch": {
+                "method": "POST",
+                "path": "/api/analyze/batch",
+                "description": "Analyze a multi-destination itinerary in one call (per-item results)"
             },
             "health": {
                 "method": "GET",
                 "path": "/api/health",
                 "description": "Check API health and service status"
             },
+            "metrics": {
+                "method": "GET",
+                "path": "/metrics",
+                "description": "Prometheus metrics: per-stage latency, upstream errors, fallbacks, cache hits, queue depths"
+            },
             "stats": {
                 "method": "GET",
                 "path": "/api/stats",
                 "description": "View usage statistics and insights"
             },
+            "stats_timeseries": {
+                "method": "GET",
+                "path": "/api/stats/timeseries?from=&to=&bucket=",
+                "description": "Bucketed usage history (hour, day, week or month)"
+            },
             "docs": {
                 "method": "GET",
                 "path": "/docs",
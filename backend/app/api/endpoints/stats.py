@@ -1,13 +1,11 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Literal, Optional
 import logging
-from app.db.session import get_db
-from app.models.report import Report
+from app.db.session import get_async_db
 from fastapi import Request, Response
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from app.core.rate_limiter import limiter
 
 logger = logging.getLogger(__name__)
@@ -15,100 +13,81 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+# All dashboard aggregates in a single statement (one DB round-trip), read
+# from the hourly report_rollups table so cost is O(buckets), not O(reports).
+# The last-24h count and first record still come from reports, but only
+# through the created_at index.
+STATS_QUERY = text("""
+WITH totals AS (
+    SELECT dimension, key,
+           sum(count) AS n,
+           sum(risk_sum) / NULLIF(sum(risk_count), 0) AS average
+    FROM report_rollups
+    GROUP BY dimension, key
+),
+top_destinations AS (
+    SELECT key, n FROM totals WHERE dimension = 'destination' ORDER BY n DESC LIMIT 10
+)
+SELECT
+    (SELECT n FROM totals WHERE dimension = 'total') AS total_analyses,
+    (SELECT json_object_agg(key, n) FROM totals WHERE dimension = 'concern') AS analyses_by_concern,
+    (SELECT json_agg(json_build_object('city', key, 'count', n) ORDER BY n DESC) FROM top_destinations) AS top_destinations,
+    (SELECT json_object_agg(key, average) FROM totals WHERE dimension = 'risk' AND average IS NOT NULL) AS average_risks,
+    (SELECT count(*) FROM reports WHERE created_at >= :since) AS recent_count,
+    (SELECT json_object_agg(key, n) FROM totals WHERE dimension = 'skin_type') AS skin_types,
+    (SELECT json_object_agg(key, n) FROM totals WHERE dimension = 'hair_type') AS hair_types,
+    (SELECT json_object_agg(key, n) FROM totals WHERE dimension = 'duration') AS durations,
+    (SELECT min(created_at) FROM reports) AS first_created_at
+""")
+
+# Bucketed history for /stats/timeseries
+TIMESERIES_QUERY = text("""
+SELECT date_trunc(:bucket, bucket_start AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket,
+       dimension, key,
+       sum(count) AS n,
+       sum(risk_sum) / NULLIF(sum(risk_count), 0) AS average
+FROM report_rollups
+WHERE bucket_start >= :start AND bucket_start < :end
+  AND dimension IN ('total', 'concern', 'risk')
+GROUP BY 1, dimension, key
+ORDER BY 1
+""")
+
+BUCKET_SIZES = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=31),
+}
+MAX_TIMESERIES_BUCKETS = 2000
+
+
 @router.get("/stats")
 @limiter.limit("30/hour")
-async def get_statistics(request: Request,response: Response,db: Session = Depends(get_db)):
+async def get_statistics(request: Request,response: Response,db: AsyncSession = Depends(get_async_db)):
     try:
-        # Total analyses
-        total_analyses = db.query(func.count(Report.id)).scalar() or 0
-        
-        # Analyses by concern
-        concern_stats = db.query(
-            Report.concern,
-            func.count(Report.id).label('count')
-        ).group_by(Report.concern).all()
-        
-        analyses_by_concern = {
-            concern: count for concern, count in concern_stats
-        }
-        
-        # Top destinations (top 10)
-        top_destinations = db.query(
-            Report.destination,
-            func.count(Report.id).label('count')
-        ).group_by(Report.destination).order_by(desc('count')).limit(10).all()
-        
-        top_destinations_list = [
-            {"city": dest, "count": count} 
-            for dest, count in top_destinations
-        ]
-        
-        # Average risk scores (only for records with risks)
-        # Get all reports with non-null risks
-        reports_with_risks = db.query(Report).filter(Report.risks.isnot(None)).all()
-        
-        if reports_with_risks:
-            # Calculate averages
-            risk_sums = {}
-            risk_counts = {}
-            
-            for report in reports_with_risks:
-                if report.risks:
-                    for risk_type, value in report.risks. items():
-                        if isinstance(value, (int, float)):
-                            if risk_type not in risk_sums:
-                                risk_sums[risk_type] = 0
-                                risk_counts[risk_type] = 0
-                            risk_sums[risk_type] += value
-                            risk_counts[risk_type] += 1
-            
-            average_risks = {
-                risk_type: round(risk_sums[risk_type] / risk_counts[risk_type], 1)
-                for risk_type in risk_sums
-            }
-        else:
-            average_risks = {}
-        
-        # Recent activity (last 24 hours)
-        yesterday = datetime.utcnow() - timedelta(hours=24)
-        recent_count = db.query(func.count(Report.id)).filter(
-            Report.created_at >= yesterday
-        ).scalar() or 0
-        
-        # Most common skin types
-        skin_type_stats = db.query(
-            Report.skin_type,
-            func.count(Report.id).label('count')
-        ).filter(Report.skin_type. isnot(None)).group_by(Report.skin_type).all()
-        
-        skin_types = {
-            skin_type: count for skin_type, count in skin_type_stats
-        }
-        
-        # Most common hair types
-        hair_type_stats = db.query(
-            Report.hair_type,
-            func.count(Report.id).label('count')
-        ).filter(Report.hair_type.isnot(None)).group_by(Report.hair_type).all()
-        
-        hair_types = {
-            hair_type: count for hair_type, count in hair_type_stats
-        }
-        
-        # Most common duration categories
-        duration_stats = db.query(
-            Report.duration_category,
-            func.count(Report.id).label('count')
-        ).group_by(Report.duration_category).all()
-        
-        durations = {
-            duration: count for duration, count in duration_stats
+        now = datetime.now(timezone.utc)
+        
+        # Recent activity window (last 24 hours)
+        yesterday = now - timedelta(hours=24)
+        row = (await db.execute(STATS_QUERY, {"since": yesterday})).one()
+        
+        total_analyses = int(row.total_analyses or 0)
+        analyses_by_concern = row.analyses_by_concern or {}
+        top_destinations_list = row.top_destinations or []
+        average_risks = {
+            risk_type: round(float(average), 1)
+            for risk_type, average in (row.average_risks or {}).items()
         }
+        recent_count = row.recent_count or 0
+        skin_types = row.skin_types or {}
+        hair_types = row.hair_types or {}
+        durations = row.durations or {}
         
         # Calculate uptime (time since first record)
-        first_record = db.query(Report).order_by(Report.created_at.asc()).first()
-        if first_record: 
-            uptime_seconds = (datetime.utcnow() - first_record.created_at).total_seconds()
+        if row.first_created_at: 
+            # created_at is timestamptz, so compare against an aware "now"
+            uptime_seconds = (now - row.first_created_at).total_seconds()
             uptime_hours = round(uptime_seconds / 3600, 1)
         else:
             uptime_hours = 0
@@ -136,4 +115,60 @@ async def get_statistics(request: Request,response: Response,db: Session = Depen
             "error": "Unable to fetch statistics",
             "message": str(e),
             "total_analyses": 0
-        }
\ No newline at end of file
+        }
+
+
+@router.get("/stats/timeseries")
+@limiter.limit("30/hour")
+async def get_statistics_timeseries(
+    request: Request,
+    response: Response,
+    start: Optional[datetime] = Query(None, alias="from", description="Range start (ISO 8601, default: 7 days before `to`)"),
+    end: Optional[datetime] = Query(None, alias="to", description="Range end, exclusive (ISO 8601, default: now)"),
+    bucket: Literal["hour", "day", "week", "month"] = Query("day"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Bucketed analysis history from the hourly rollups:
+    per-bucket totals, counts by concern and average risk scores.
+    """
+    end = _as_utc(end) if end else datetime.now(timezone.utc)
+    start = _as_utc(start) if start else end - timedelta(days=7)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="`from` must be before `to`")
+    if (end - start) / BUCKET_SIZES[bucket] > MAX_TIMESERIES_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range too large for '{bucket}' buckets (max {MAX_TIMESERIES_BUCKETS})"
+        )
+
+    rows = (await db.execute(TIMESERIES_QUERY, {"bucket": bucket, "start": start, "end": end})).all()
+
+    series: Dict[datetime, Dict[str, Any]] = {}
+    for row in rows:
+        point = series.setdefault(row.bucket, {
+            "bucket_start": row.bucket.isoformat().replace("+00:00", "Z"),
+            "total_analyses": 0,
+            "analyses_by_concern": {},
+            "average_risks": {}
+        })
+        if row.dimension == "total":
+            point["total_analyses"] = int(row.n)
+        elif row.dimension == "concern":
+            point["analyses_by_concern"][row.key] = int(row.n)
+        elif row.average is not None:
+            point["average_risks"][row.key] = round(float(row.average), 1)
+
+    return {
+        "from": start.isoformat().replace("+00:00", "Z"),
+        "to": end.isoformat().replace("+00:00", "Z"),
+        "bucket": bucket,
+        "series": list(series.values())
+    }
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive query timestamps are taken as UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
@@ -10,7 +10,81 @@ class Settings(BaseSettings):
     GROQ_API_KEY: str
     # general httpx timeout seconds
     HTTP_TIMEOUT: int = 10
+    # shared upstream connection pools (see app/core/http_client.py)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = False
+    HTTP_PREWARM: bool = True
+    HTTP_PREWARM_TIMEOUT: float = 3.0
+    # upstream calls (see app/core/upstream.py): retries with jittered
+    # exponential backoff, a retry budget shared by all providers, hedging
+    # (0 disables) and a per-provider circuit breaker
+    UPSTREAM_RETRIES: int = 2
+    UPSTREAM_BACKOFF_BASE: float = 0.25
+    UPSTREAM_BACKOFF_MAX: float = 2.0
+    UPSTREAM_RETRY_BUDGET_RATIO: float = 0.2
+    UPSTREAM_RETRY_BUDGET_BURST: float = 10.0
+    UPSTREAM_HEDGE_AFTER: float = 0.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT: float = 30.0
+    # geocode cache: in-process LRU + persistent geocode_cache table
+    GEOCODE_CACHE_SIZE: int = 1024
+    GEOCODE_CACHE_TTL: int = 30 * 24 * 3600
+    GEOCODE_NEGATIVE_TTL: int = 600
+    GEOCODE_CACHE_PERSIST: bool = True
+    # how often (seconds) expired rows are deleted from the cache tables (0 disables)
+    CACHE_PRUNE_INTERVAL: float = 3600.0
+    # weather/AQ cache: keyed by lat/lon grid cell, TTLs follow provider cadence
+    ENV_CACHE_GRID_DEG: float = 0.1
+    ENV_CACHE_SIZE: int = 4096
+    WEATHER_CACHE_TTL: int = 3600
+    UV_CACHE_TTL: int = 24 * 3600
+    AQI_CACHE_TTL: int = 3600
+    # how long past its TTL an entry may be served while it refreshes
+    ENV_CACHE_STALE_TTL: int = 3600
+    # LLM calls: per-worker concurrency cap and per-call deadline (seconds)
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_TIMEOUT: float = 20.0
+    # stream completions and stop reading once the JSON answer is complete
+    LLM_STREAMING: bool = True
+    # end-to-end budget (seconds) for /api/analyze and /api/analyze/stream,
+    # 0 disables; clients may send X-Request-Timeout-Ms (capped at
+    # ANALYZE_DEADLINE_MAX). With less than LLM_MIN_BUDGET left, the
+    # heuristic rules replace the LLM
+    ANALYZE_DEADLINE: float = 20.0
+    ANALYZE_DEADLINE_MAX: float = 60.0
+    LLM_MIN_BUDGET: float = 2.0
+    # LLM result cache keyed on bucketed conditions + profile: in-process LRU
+    # + persistent llm_cache table shared by every worker
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_SIZE: int = 2048
+    LLM_CACHE_TTL: int = 6 * 3600
+    LLM_CACHE_PERSIST: bool = True
     DATABASE_URL: str
+    # create missing tables at startup (Alembic owns the schema; local dev only)
+    DB_CREATE_ALL: bool = False
+    # async engine pool (request path)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: float = 30.0
+    # report write-behind queue
+    REPORT_QUEUE_SIZE: int = 1000
+    REPORT_BATCH_SIZE: int = 50
+    REPORT_FLUSH_INTERVAL: float = 1.0
+    REPORT_ENQUEUE_TIMEOUT: float = 0.05
+    # /api/analyze/batch: max items, upstream concurrency per batch, deadline
+    # for the whole batch (seconds, 0 disables), and the rate limit (each
+    # unique destination counts as one hit)
+    BATCH_MAX_ITEMS: int = 20
+    BATCH_MAX_CONCURRENCY: int = 4
+    BATCH_DEADLINE: float = 60.0
+    BATCH_RATE_LIMIT: str = "50/hour"
+    # water quality dataset hot reload: poll interval in seconds (0 disables)
+    WATER_RELOAD_INTERVAL: float = 30.0
+    # Prometheus-format /metrics endpoint (stage latencies, counters, gauges)
+    METRICS_ENABLED: bool = True
     SOURCE_VERSION: str
     FRONTEND_URL: str
     class Config:
@@ -0,0 +1,189 @@
+"""
+Small in-process caches shared by the service layer.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .deadline import without_deadline
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache with a per-entry time-to-live.
+    Values may be None (useful for negative caching), so lookups
+    return a (found, value) pair instead of the bare value.
+    Thread-safe, since lookups can happen from worker threads.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return False, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
+
+
+class StaleWhileRevalidateCache:
+    """
+    Size-bounded LRU cache that serves stale entries while refreshing them
+    in the background.
+
+    - age < ttl: fresh hit
+    - ttl <= age < ttl + stale_ttl: stale hit, refresh scheduled (once per key)
+    - otherwise: miss, caller awaits the fetch
+
+    Fetchers return None on failure; None is never cached.
+    """
+
+    def __init__(self, maxsize: int, stale_ttl: float):
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+        self._refreshing: Dict[Hashable, "asyncio.Task"] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def _store(self, key: Hashable, ttl: float, value: Any) -> None:
+        self._data[key] = (time.monotonic(), ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float
+    ) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            fetched_at, entry_ttl, value = entry
+            age = time.monotonic() - fetched_at
+            if age < entry_ttl:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return value
+            if age < entry_ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._data.move_to_end(key)
+                self._schedule_refresh(key, fetch, ttl)
+                return value
+
+        self.misses += 1
+        value = await fetch()
+        if value is not None:
+            self._store(key, ttl, value)
+        return value
+
+    def contains(self, key: Hashable) -> bool:
+        """Whether get_or_fetch would answer from the cache (fresh or stale). Not counted as a lookup."""
+        entry = self._data.get(key)
+        if entry is None:
+            return False
+        fetched_at, entry_ttl, _ = entry
+        return time.monotonic() - fetched_at < entry_ttl + self.stale_ttl
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store a value fetched alongside another key's (None is ignored, as for fetches)."""
+        if value is not None:
+            self._store(key, ttl, value)
+
+    def _schedule_refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float) -> None:
+        if key in self._refreshing:
+            return
+
+        async def _refresh() -> None:
+            try:
+                # Not bound by the deadline of the request that found the entry stale
+                value = await without_deadline(fetch)
+                if value is not None:
+                    self._store(key, ttl, value)
+                    self.refreshes += 1
+                else:
+                    self.refresh_errors += 1
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning(f"Background refresh failed for {key}: {e}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(_refresh())
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "background_refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "refreshing": len(self._refreshing),
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 3) if lookups else None
+        }
@@ -0,0 +1,116 @@
+"""
+Per-request deadline, carried in a context variable so every stage of the
+analyze pipeline (and the LLM wait) can see how much of the request's budget
+is left without it being threaded through every signature.
+
+asyncio tasks copy the context when they are created, so stages fanned out
+with gather / create_task share the request's Deadline object. Work shared
+between requests (single-flight calls, background cache refreshes) must
+not inherit whichever request happened to start it, so it runs under
+without_deadline(); each caller bounds only its own wait for the shared
+result, with wait_for(..., time_left()).
+
+A batch runs all of its items under one deadline; cut_scope() records the
+stages cut for each item separately, so one item's cut stage doesn't lower
+the confidence of the others.
+"""
+
+import copy
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Deadline:
+    """An absolute expiry time plus the stages that were cut short by it."""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+        self.cut_stages: List[str] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def cut(self, stage: str) -> None:
+        if stage not in self.cut_stages:
+            self.cut_stages.append(stage)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(budget: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """Run the block under a deadline `budget` seconds from now (None or <= 0: no deadline)."""
+    deadline = Deadline(budget) if budget and budget > 0 else None
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def cut_scope(stages: Optional[List[str]] = None) -> Iterator[List[str]]:
+    """
+    Run the block under the current deadline, but record the stages it cuts
+    in `stages` (a new list if None, yielded) instead of the deadline's own.
+    """
+    stages = [] if stages is None else stages
+    deadline = _current.get()
+    if deadline is None:
+        yield stages
+        return
+    scoped = copy.copy(deadline)
+    scoped.cut_stages = stages
+    token = _current.set(scoped)
+    try:
+        yield stages
+    finally:
+        _current.reset(token)
+
+
+async def without_deadline(fn: Callable[[], Awaitable[T]]) -> T:
+    """Await fn() with no request deadline, e.g. as the body of a task shared by several requests."""
+    with request_deadline(None):
+        return await fn()
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+def time_left(timeout: Optional[float] = None) -> Optional[float]:
+    """
+    The timeout to give the next step: `timeout` clamped to what is left of
+    the request's budget. None means no limit at all.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return timeout
+    remaining = deadline.remaining()
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def deadline_expired() -> bool:
+    deadline = _current.get()
+    return deadline is not None and deadline.expired()
+
+
+def mark_cut(stage: str) -> None:
+    """Record that `stage` was skipped or cut short by the request deadline."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.cut(stage)
+
+
+def cut_stages() -> List[str]:
+    deadline = _current.get()
+    return list(deadline.cut_stages) if deadline is not None else []
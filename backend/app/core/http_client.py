@@ -0,0 +1,128 @@
+"""
+Application-scoped HTTP client registry.
+One pooled httpx.AsyncClient per upstream provider, opened at startup and
+closed on shutdown, so requests reuse warm keep-alive connections instead of
+paying a TCP+TLS handshake on every call.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import ssl
+from typing import Dict, Optional
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Provider name -> (base URL, default headers)
+PROVIDERS: Dict[str, Dict[str, object]] = {
+    "nominatim": {
+        "base_url": str(settings.GEOCODE_BASE_URL).rstrip("/"),
+        # Nominatim requires a descriptive user-agent; include app name and optional contact
+        "headers": {
+            "User-Agent": f"{settings.APP_NAME} (contact: iamyashtiwari28@gmail.com)",
+            "Accept-Language": "en"
+        },
+    },
+    "open_meteo": {
+        "base_url": str(settings.OPEN_METEO_BASE).rstrip("/"),
+        "headers": {"User-Agent": f"{settings.APP_NAME} (dev)"},
+    },
+    "open_meteo_air": {
+        "base_url": str(settings.OPENAQ_BASE).rstrip("/"),
+        "headers": {"User-Agent": f"{settings.APP_NAME} (dev)"},
+    },
+}
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install 'httpx[http2]')."""
+    if not settings.HTTP2_ENABLED:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP2_ENABLED is set but the 'h2' package is missing; falling back to HTTP/1.1")
+        return False
+    return True
+
+
+class HTTPClientRegistry:
+    """
+    Holds one long-lived AsyncClient per provider.
+    Each client keeps its own keep-alive pool for its host.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    def _ssl(self) -> ssl.SSLContext:
+        """One TLS context for every provider; loading the CA bundle is the slow part."""
+        if self._ssl_context is None:
+            self._ssl_context = httpx.create_ssl_context()
+        return self._ssl_context
+
+    def _build_client(self, name: str) -> httpx.AsyncClient:
+        provider = PROVIDERS[name]
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+        return httpx.AsyncClient(
+            timeout=settings.HTTP_TIMEOUT,
+            headers=provider["headers"],
+            limits=limits,
+            verify=self._ssl(),
+            http2=_http2_enabled()
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """
+        Return the pooled client for a provider.
+        Clients are created lazily, so scripts that never run the app
+        startup hook still work.
+        """
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build_client(name)
+            self._clients[name] = client
+        return client
+
+    async def start(self) -> None:
+        """Create every provider client and optionally pre-warm connections."""
+        for name in PROVIDERS:
+            self.get(name)
+        logger.info(f"HTTP client registry started ({len(self._clients)} providers, http2={_http2_enabled()})")
+        if settings.HTTP_PREWARM:
+            await self.prewarm()
+
+    async def prewarm(self) -> None:
+        """
+        Open one connection per provider host at boot so the first user
+        request doesn't pay for DNS + TCP + TLS. Failures are only logged.
+        """
+        async def _warm(name: str) -> None:
+            try:
+                await self.get(name).head(PROVIDERS[name]["base_url"], timeout=settings.HTTP_PREWARM_TIMEOUT)
+                logger.info(f"Pre-warmed HTTP connection to {name}")
+            except Exception as e:
+                logger.warning(f"Could not pre-warm HTTP connection to {name}: {e}")
+
+        await asyncio.gather(*(_warm(name) for name in PROVIDERS))
+
+    async def close(self) -> None:
+        """Close every client and release pooled sockets."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+        logger.info("HTTP client registry closed")
+
+
+http_clients = HTTPClientRegistry()
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    return http_clients.get(name)
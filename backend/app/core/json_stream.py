@@ -0,0 +1,156 @@
+"""
+Incremental parser for a JSON object that arrives in chunks (e.g. a
+streamed LLM completion).
+
+Only the top level is tracked: members are reported as soon as their value
+closes, and elements of top-level arrays as soon as each element closes,
+without waiting for the rest of the document.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+# Event kinds returned by feed()
+MEMBER = "member"  # ("member", key, value): a top-level member is complete
+ITEM = "item"      # ("item", key, value): an element of the top-level array `key` is complete
+
+
+class IncrementalJSONParser:
+    """
+    Feed text with feed(); it returns the events completed by that chunk.
+
+    - Text before the first "{" (markdown fences, prose) is skipped.
+    - `done` is set once the top-level object closes; later text is ignored.
+    - `members` holds every completed top-level member so far, so a
+      truncated stream still yields whatever was complete.
+
+    Raises json.JSONDecodeError on malformed input.
+    """
+
+    def __init__(self):
+        self.members: Dict[str, Any] = {}
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # top-level state: key -> colon -> value_start -> value -> after_value
+        self._state = "key"
+        self._key: Optional[str] = None
+        self._key_start = 0
+        self._value_start = 0
+        self._in_array = False
+        self._item_start: Optional[int] = None
+
+    def _loads(self, start: int, end: int) -> Any:
+        return json.loads(self._text[start:end])
+
+    def _error(self, message: str, pos: int) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._text, pos)
+
+    def _member(self, end: int, events: List[Tuple[str, str, Any]]) -> None:
+        value = self._loads(self._value_start, end)
+        self.members[self._key] = value
+        events.append((MEMBER, self._key, value))
+
+    def _item(self, end: int, events: List[Tuple[str, str, Any]]) -> None:
+        if self._item_start is not None:
+            events.append((ITEM, self._key, self._loads(self._item_start, end)))
+            self._item_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, Any]]:
+        if self.done:
+            return []
+        self._text += chunk
+        text = self._text
+        events: List[Tuple[str, str, Any]] = []
+        i = self._pos
+
+        while i < len(text) and not self.done:
+            c = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._state == "key":
+                        self._key = self._loads(self._key_start, i + 1)
+                        self._state = "colon"
+                i += 1
+                continue
+
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                i += 1
+                continue
+
+            if c in _WHITESPACE:
+                i += 1
+                continue
+
+            if self._depth == 1:
+                if self._state == "key":
+                    if c == '"':
+                        self._in_string = True
+                        self._key_start = i
+                    elif c == "}" and not self.members:
+                        self.done = True
+                    else:
+                        raise self._error("Expecting property name", i)
+                elif self._state == "colon":
+                    if c != ":":
+                        raise self._error("Expecting ':' delimiter", i)
+                    self._state = "value_start"
+                elif self._state == "value_start":
+                    self._value_start = i
+                    self._state = "value"
+                    if c == '"':
+                        self._in_string = True
+                    elif c in "{[":
+                        self._depth = 2
+                        self._in_array = c == "["
+                        self._item_start = None
+                elif self._state == "value":
+                    # Only strings and scalars end at depth 1
+                    if c in ",}":
+                        self._member(i, events)
+                        self._state = "key"
+                        self.done = c == "}"
+                else:  # after_value
+                    if c == ",":
+                        self._state = "key"
+                    elif c == "}":
+                        self.done = True
+                    else:
+                        raise self._error("Expecting ',' delimiter", i)
+            else:
+                at_item_level = self._depth == 2 and self._in_array
+                if c in "}]":
+                    self._depth -= 1
+                    if self._depth == 1:
+                        if self._in_array:
+                            self._item(i, events)
+                        self._member(i + 1, events)
+                        self._state = "after_value"
+                elif at_item_level and c == ",":
+                    self._item(i, events)
+                else:
+                    if at_item_level and self._item_start is None:
+                        self._item_start = i
+                    if c == '"':
+                        self._in_string = True
+                    elif c in "{[":
+                        self._depth += 1
+            i += 1
+
+        self._pos = i
+        return events
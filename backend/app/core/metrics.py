@@ -0,0 +1,230 @@
+"""
+Minimal in-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain Python numbers updated on the
+event loop (no locks, no background thread, no agent), so recording is a
+dict lookup and an addition. Everything else the server already counts
+(cache hits, upstream failures, queue depths, ...) is not double-counted
+here: collectors registered with register_collector() read those stats
+dicts when /metrics is scraped.
+
+Values are per worker process, like the rest of the /api/health stats;
+Prometheus tells workers apart by their scrape target.
+"""
+
+import math
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers in-memory lookups (ms) up to a full LLM_TIMEOUT
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+# (labels, value) pairs; a histogram's suffixed samples carry the suffix in labels["__suffix"]
+Sample = Tuple[Dict[str, str], float]
+# (name, type, help, samples) as produced by a collector
+Family = Tuple[str, str, str, Iterable[Sample]]
+
+_metrics: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[Family]]] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return _escape(value).replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(str(value))}"' for key, value in labels.items()) + "}"
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        _metrics.append(self)
+
+    def labels(self, *values: str):
+        """The child for one combination of label values, created on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonic count. The name should end in _total."""
+
+    type = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def samples(self) -> Iterable[Sample]:
+        for values, child in self._children.items():
+            yield dict(zip(self.labelnames, values)), child.value
+
+
+class Gauge(Counter):
+    """A value that goes up and down."""
+
+    type = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: "_HistogramValue"):
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # Per-bucket (non-cumulative) counts; the last slot is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        """Context manager observing the wall time of its block."""
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets (upper bounds, inclusive)."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def samples(self) -> Iterable[Sample]:
+        for values, child in self._children.items():
+            labels = dict(zip(self.labelnames, values))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                yield {**labels, "le": _format_value(bound), "__suffix": "_bucket"}, cumulative
+            yield {**labels, "__suffix": "_sum"}, child.sum
+            yield {**labels, "__suffix": "_count"}, child.count
+
+
+def register_collector(collector: Callable[[], Iterable[Family]]) -> None:
+    """Add a function called at scrape time that yields (name, type, help, samples)."""
+    _collectors.append(collector)
+
+
+def _render_family(lines: List[str], name: str, type_: str, documentation: str, samples: Iterable[Sample]) -> None:
+    lines.append(f"# HELP {name} {_escape(documentation)}")
+    lines.append(f"# TYPE {name} {type_}")
+    for labels, value in samples:
+        if value is None:
+            continue
+        suffix = labels.pop("__suffix", "")
+        lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+
+
+def render() -> str:
+    """Every metric and collector, in the Prometheus text format."""
+    lines: List[str] = []
+    for metric in _metrics:
+        _render_family(lines, metric.name, metric.type, metric.documentation, metric.samples())
+    for collector in _collectors:
+        for name, type_, documentation, samples in collector():
+            _render_family(lines, name, type_, documentation, samples)
+    return "\n".join(lines) + "\n"
+
+
+# Recorded directly by the analyze pipeline (everything else is collected
+# from existing stats, see api/endpoints/metrics.py)
+ANALYZE_STAGE_SECONDS = Histogram(
+    "geodermal_analyze_stage_duration_seconds",
+    "Time spent in each analyze pipeline stage",
+    ["stage"]
+)
+LLM_FALLBACKS = Counter(
+    "geodermal_llm_fallbacks_total",
+    "LLM answers replaced by the heuristic rules (or the unavailable response), by reason",
+    ["reason"]
+)
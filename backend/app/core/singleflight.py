@@ -0,0 +1,103 @@
+"""
+Single-flight call coalescing: concurrent calls with the same key share one
+in-flight execution instead of each hitting the upstream.
+
+Unlike a cache this only covers calls that overlap in time; it is what stops
+a burst of identical requests from stampeding an upstream before the first
+answer has been cached.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, TypeVar
+
+from .deadline import without_deadline
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_groups: List["SingleFlight"] = []
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent do(key, fn) calls: the first caller for a key runs
+    fn() in its own task; callers arriving while it runs await the same
+    task and get the same result (or exception). The result object is
+    shared, so callers must not mutate it.
+
+    Cancellation is per caller: a cancelled caller stops waiting, but the
+    call keeps running for the others. It is only cancelled once every
+    caller waiting on it has gone. fn() runs without a request deadline
+    (see core.deadline), so callers with a budget wrap do() in wait_for.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.abandoned = 0
+        _groups.append(self)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            self.calls += 1
+            # Detached from this caller's deadline: the result is shared by
+            # callers whose budgets differ, and each bounds its own wait
+            flight = _Flight(asyncio.ensure_future(without_deadline(fn)))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finished(key, flight, task))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            # shield: cancelling this caller must not cancel the shared task
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to use the result; later callers start afresh
+                self.abandoned += 1
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    def _finished(self, key: Hashable, flight: _Flight, task: "asyncio.Task") -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.calls + self.coalesced
+        return {
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "abandoned": self.abandoned,
+            "coalesced_rate": round(self.coalesced / total, 3) if total else None
+        }
+
+
+def singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every SingleFlight group, by name."""
+    return {group.name: group.stats() for group in _groups}
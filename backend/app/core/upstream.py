@@ -0,0 +1,267 @@
+"""
+Resilient GET-JSON calls to upstream providers (Nominatim, Open-Meteo).
+
+Every call goes through:
+- a per-provider circuit breaker: after CIRCUIT_FAILURE_THRESHOLD
+  consecutive failures the provider is skipped (CircuitOpenError, no
+  network call) for CIRCUIT_RESET_TIMEOUT seconds, then one probe call
+  decides whether it closes again
+- retries with exponential backoff and full jitter, for transport errors,
+  429 and 5xx only
+- a global retry budget: each call earns UPSTREAM_RETRY_BUDGET_RATIO of a
+  token and each retry (or hedge) spends one, so while providers are
+  failing retries stay a bounded fraction of traffic instead of
+  multiplying it
+- optional hedging: with UPSTREAM_HEDGE_AFTER > 0, an attempt still
+  pending after that many seconds is raced against a second identical
+  request, and the first success wins
+
+Calls are not bound by a request deadline: they run inside single-flight
+calls and background refreshes shared by several requests (see
+core.deadline), and each request only bounds its own wait for the result.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from ..config import settings
+from .http_client import PROVIDERS, get_http_client
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """The provider's circuit breaker is open; the call was not made."""
+
+    def __init__(self, provider: str):
+        super().__init__(f"circuit open for {provider}")
+        self.provider = provider
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half_open once `reset_timeout` has passed, letting one probe
+    through; the probe's outcome closes or re-opens it. A probe that never
+    reports back (e.g. cancelled) expires after another `reset_timeout`.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.opens = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        if self.state == "closed":
+            return True
+        if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self.probe_started = now
+            return True
+        if self.state == "half_open" and now - self.probe_started >= self.reset_timeout:
+            self.probe_started = now
+            return True
+        self.rejected += 1
+        return False
+
+    def is_open(self) -> bool:
+        """Whether the breaker has tripped. Unlike allow(), never counts a rejection or starts a probe."""
+        return self.state == "open"
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.state = "closed"
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opens += 1
+                logger.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opens": self.opens,
+            "rejected": self.rejected
+        }
+
+
+class RetryBudget:
+    """Token bucket shared by every provider: calls deposit, retries withdraw."""
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+        self.retries = 0
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.retries += 1
+            return True
+        self.exhausted += 1
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tokens": round(self.tokens, 2),
+            "burst": self.burst,
+            "ratio": self.ratio,
+            "retries": self.retries,
+            "exhausted": self.exhausted
+        }
+
+
+class _Provider:
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name, settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_TIMEOUT)
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.stats(),
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins
+        }
+
+
+retry_budget = RetryBudget(settings.UPSTREAM_RETRY_BUDGET_RATIO, settings.UPSTREAM_RETRY_BUDGET_BURST)
+_providers: Dict[str, _Provider] = {name: _Provider(name) for name in PROVIDERS}
+
+
+def _provider(name: str) -> _Provider:
+    provider = _providers.get(name)
+    if provider is None:
+        provider = _providers[name] = _Provider(name)
+    return provider
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transport errors, 429/5xx and unparseable bodies; other 4xx are the caller's fault."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, (httpx.TransportError, ValueError))
+
+
+def backoff_delay(retry: int) -> float:
+    """Full jitter: uniform in [0, min(max, base * 2^(retry-1))]."""
+    ceiling = min(settings.UPSTREAM_BACKOFF_MAX, settings.UPSTREAM_BACKOFF_BASE * 2 ** (retry - 1))
+    return random.uniform(0, ceiling)
+
+
+async def _attempt(client: httpx.AsyncClient, url: str, params: Dict[str, Any]) -> Any:
+    resp = await client.get(url, params=params)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _hedged(provider: _Provider, attempt: Callable[[], Awaitable[Any]], hedge_after: float) -> Any:
+    """Run attempt(); if it is still pending after hedge_after seconds, race a second one."""
+    first = asyncio.ensure_future(attempt())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done or not retry_budget.withdraw():
+            return await first
+
+        provider.hedges += 1
+        second = asyncio.ensure_future(attempt())
+        tasks.add(second)
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        provider.hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def get_json(provider_name: str, url: str, params: Dict[str, Any], hedge: bool = True) -> Any:
+    """
+    GET url with the provider's pooled client and return the decoded JSON.
+
+    Raises CircuitOpenError without calling the provider while its breaker
+    is open, otherwise the last error once retries (or the retry budget)
+    run out. Pass hedge=False for providers whose usage policy forbids
+    duplicate requests.
+    """
+    provider = _provider(provider_name)
+    breaker = provider.breaker
+    if not breaker.allow():
+        raise CircuitOpenError(provider_name)
+
+    client = get_http_client(provider_name)
+    hedge_after = settings.UPSTREAM_HEDGE_AFTER if hedge else 0
+    provider.calls += 1
+    retry_budget.deposit()
+
+    retry = 0
+    while True:
+        try:
+            if hedge_after > 0:
+                data = await _hedged(provider, lambda: _attempt(client, url, params), hedge_after)
+            else:
+                data = await _attempt(client, url, params)
+        except Exception as e:
+            if not is_retryable(e):
+                # The provider answered; the request itself was rejected
+                breaker.record_success()
+                raise
+            provider.failures += 1
+            breaker.record_failure()
+            # The failure just recorded may have tripped the breaker (or failed its probe)
+            if retry >= settings.UPSTREAM_RETRIES or breaker.is_open() or not retry_budget.withdraw():
+                raise
+            retry += 1
+            provider.retries += 1
+            delay = backoff_delay(retry)
+            logger.warning(f"{provider_name} request failed ({e!r}); retry {retry} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return data
+
+
+def upstream_stats() -> Dict[str, Any]:
+    return {
+        "retry_budget": retry_budget.stats(),
+        "providers": {name: provider.stats() for name, provider in _providers.items()}
+    }
@@ -1,10 +1,12 @@
 from sqlalchemy import create_engine
 from sqlalchemy. orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from .. config import settings
+from .urls import async_database_url, sync_database_url
 
-# Create database engine
+# Create database engine (sync: used by Alembic, scripts and startup schema work)
 engine = create_engine(
-    settings.DATABASE_URL,
+    sync_database_url(settings.DATABASE_URL),
     pool_pre_ping=True,  # Verify connections before using
     echo=False,  # Set to True for SQL query logging during development
 )
@@ -12,10 +14,35 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the request path, so DB I/O never blocks the event loop
+_async_url, _async_connect_args = async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    _async_url,
+    connect_args=_async_connect_args,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+    echo=False,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Dependency for FastAPI endpoints
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Async dependency for FastAPI endpoints
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,37 @@
+"""
+Helpers to derive driver-specific database URLs from DATABASE_URL.
+The app's request path uses asyncpg; Alembic and scripts use psycopg2.
+"""
+from typing import Any, Dict, Tuple
+from sqlalchemy.engine import make_url, URL
+
+# libpq sslmode values that asyncpg understands through its `ssl` argument
+_ASYNCPG_SSL_MODES = {"disable", "allow", "prefer", "require", "verify-ca", "verify-full"}
+
+
+def _normalize_scheme(url: str) -> URL:
+    # Render/Heroku style URLs use the legacy "postgres://" scheme
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return make_url(url)
+
+
+def sync_database_url(url: str) -> str:
+    """DATABASE_URL with the psycopg2 driver, whatever driver it was given with."""
+    parsed = _normalize_scheme(url)
+    return parsed.set(drivername="postgresql+psycopg2").render_as_string(hide_password=False)
+
+
+def async_database_url(url: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    DATABASE_URL with the asyncpg driver, plus connect_args.
+    asyncpg rejects libpq's `sslmode` query parameter, so it's moved into `ssl`.
+    """
+    parsed = _normalize_scheme(url)
+    query = dict(parsed.query)
+    connect_args: Dict[str, Any] = {}
+    sslmode = query.pop("sslmode", None)
+    if sslmode in _ASYNCPG_SSL_MODES:
+        connect_args["ssl"] = sslmode
+    parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    return parsed.render_as_string(hide_password=False), connect_args
@@ -1,20 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 from .api.endpoints.analyze import router as analyze_router
 from .api.endpoints.health import router as health_router
+from .api.endpoints.metrics import router as metrics_router
 from .api.endpoints.root import router as root_router
 from .api.endpoints.stats import router as stats_router
 from .config import settings
 from .db.base import Base
-from .db.session import engine, get_db
-from sqlalchemy.orm import Session
+from .db.session import async_engine
 import logging
-from .services.clients.water_quality import load_water_quality_data
-from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from app.core.rate_limiter import limiter, rate_limit_exceeded_handler
+from app.core.http_client import http_clients
+from app.services.cache_pruner import cache_pruner
+from app.services.report_writer import report_writer
+from app.services.water_reloader import water_reloader
 
 
 load_dotenv()
@@ -27,7 +28,6 @@ app = FastAPI(
     description="AI-powered environmental skin & hair analysis for travelers",
     version="1.0.0"
 )
-Base.metadata.create_all(bind=engine)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
@@ -41,10 +41,27 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def on_startup():
+    # Alembic owns the schema; create_all is opt-in so a cold start never
+    # blocks on the database before the server can take requests
+    if settings.DB_CREATE_ALL:
+        logger.info("Creating missing database tables...")
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
     logger.info("Loading water quality data into database...")
-    load_water_quality_data()
+    await water_reloader.start()
+    await http_clients.start()
+    await report_writer.start()
+    await cache_pruner.start()
     logger.info("application startup complete!!")
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Drain queued reports before the process exits
+    await report_writer.stop()
+    await cache_pruner.stop()
+    await water_reloader.stop()
+    await http_clients.close()
+
 @app.get("/")
 async def greeting():
     return {"message": "hello there from server"}
@@ -57,3 +74,6 @@ app.include_router(analyze_router, prefix="/api", tags=["analysis"])
 app.include_router(root_router, prefix="/api", tags=["root"])
 app.include_router(stats_router, prefix="/api", tags=["statistics"])
 app.include_router(health_router, prefix="/api", tags=["server-health"])
+if settings.METRICS_ENABLED:
+    # Root path, where Prometheus scrapes by default
+    app.include_router(metrics_router)
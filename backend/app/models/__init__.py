@@ -1,3 +1,6 @@
 from .report import Report
+from .geocode_cache import GeocodeCacheEntry
+from .report_rollup import ReportRollup
+from .llm_cache import LLMCacheEntry
 
-__all__ = ["Report"]
\ No newline at end of file
+__all__ = ["Report", "GeocodeCacheEntry", "ReportRollup", "LLMCacheEntry"]
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Float, Boolean, DateTime
+from sqlalchemy.sql import func
+from .. db.base import Base
+
+class GeocodeCacheEntry(Base):
+    __tablename__ = "geocode_cache"
+    
+    # Normalized place string (see services.geocode_cache.normalize_place)
+    key = Column(String(255), primary_key=True)
+    
+    # Geocoding result; found=False is a negative entry ("location not found")
+    found = Column(Boolean, nullable=False, default=True)
+    lat = Column(Float, nullable=True)
+    lon = Column(Float, nullable=True)
+    display_name = Column(String, nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<GeocodeCacheEntry(key={self.key}, found={self.found}, expires_at={self.expires_at})>"
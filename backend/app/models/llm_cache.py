@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from .. db.base import Base
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+    
+    # Bucketed feature key (see services.llm_cache.llm_cache_key)
+    key = Column(String(255), primary_key=True)
+    
+    # Normalized LLM result: risks, recommendations, explanations
+    result = Column(JSONB, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<LLMCacheEntry(key={self.key}, expires_at={self.expires_at})>"
@@ -9,7 +9,7 @@ class Report(Base):
     
     # Primary key & metadata
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     source_version = Column(String(50), nullable=False)
     
@@ -42,6 +42,7 @@ class Report(Base):
     water_ph = Column(Float, nullable=True)
     water_tds = Column(Integer, nullable=True)
     water_chlorine = Column(Float, nullable=True)
+    water_dataset_version = Column(String(64), nullable=True)
     
     # Risk labels (heuristic outputs for training)
     risks = Column(JSONB, nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Float, BigInteger, DateTime
+from .. db.base import Base
+
+class ReportRollup(Base):
+    __tablename__ = "report_rollups"
+    
+    # Hour bucket (UTC) the counted reports were created in
+    bucket_start = Column(DateTime(timezone=True), primary_key=True, index=True)
+    
+    # Dimension being counted: total, concern, destination, skin_type,
+    # hair_type, duration or risk; key is the value of that dimension
+    dimension = Column(String(32), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    
+    # Report counts (all dimensions except risk)
+    count = Column(BigInteger, nullable=False, default=0)
+    
+    # Risk score sums/counts (risk dimension only), averaged at read time
+    risk_sum = Column(Float, nullable=False, default=0.0)
+    risk_count = Column(BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<ReportRollup(bucket_start={self.bucket_start}, dimension={self.dimension}, key={self.key}, count={self.count})>"
@@ -1,11 +1,19 @@
-from pydantic import BaseModel
-from typing import Optional, Literal
+from pydantic import BaseModel, Field
+from typing import List, Optional, Literal
 
 class AnalyzeRequest(BaseModel):
-    destination: str
+    # Lengths match the reports columns, so oversized input is a 422 here
+    # rather than a failed insert after the response was sent
+    destination: str = Field(..., max_length=255)
     duration_category: Literal["<48h", "2-7d", "1-4w", "relocation"]
-    month_or_season: str
-    home_city: str
+    month_or_season: str = Field(..., max_length=50)
+    home_city: str = Field(..., max_length=255)
     concern: Literal["skin", "hair"]
     skin_type: Optional[Literal["dry", "oily", "normal", "combination", "sensitive"]] = None
-    hair_type: Optional[Literal["straight", "wavy", "curly", "coily"]] = None
\ No newline at end of file
+    hair_type: Optional[Literal["straight", "wavy", "curly", "coily"]] = None
+    # "fast" skips the LLM and scores with the heuristic rule table
+    mode: Literal["full", "fast"] = "full"
+
+
+class AnalyzeBatchRequest(BaseModel):
+    items: List[AnalyzeRequest] = Field(..., min_length=1)
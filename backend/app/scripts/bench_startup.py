@@ -0,0 +1,95 @@
+"""
+Cold-start benchmark: import time, startup hooks and first-request latency.
+
+Usage:
+    python -m app.scripts.bench_startup
+    python -m app.scripts.bench_startup --runs 5 --max-import 1.5 --max-first-request 0.5
+
+Each run is a fresh interpreter (so nothing is already imported), which
+imports app.main, runs the startup hooks and times the first request to
+--path. Medians are reported; exits non-zero if a median is over its
+threshold, so it can gate CI or a deploy.
+
+Startup runs with HTTP_PREWARM and the dataset watcher off so the numbers
+do not depend on the network. The first request hits /health by default,
+which needs no database or upstream API.
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    started = time.perf_counter()
+    response = client.get(sys.argv[1])
+    first = time.perf_counter()
+heavy = [name for name in ("groq", "numpy", "pandas") if name in sys.modules]
+print(json.dumps({
+    "import_s": imported - start,
+    "startup_s": started - imported,
+    "first_request_s": first - started,
+    "status": response.status_code,
+    "heavy_modules": heavy,
+}))
+"""
+
+
+def run_once(path: str) -> dict:
+    env = {**os.environ, "HTTP_PREWARM": "false", "WATER_RELOAD_INTERVAL": "0"}
+    result = subprocess.run(
+        [sys.executable, "-c", _CHILD, path],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"benchmark run failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold-start import and first-request latency")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--path", default="/health", help="endpoint for the first request")
+    parser.add_argument("--max-import", type=float, default=2.0, help="seconds (median)")
+    parser.add_argument("--max-startup", type=float, default=1.0, help="seconds (median)")
+    parser.add_argument("--max-first-request", type=float, default=0.5, help="seconds (median)")
+    args = parser.parse_args()
+
+    runs = [run_once(args.path) for _ in range(args.runs)]
+    medians = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("import_s", "startup_s", "first_request_s")
+    }
+    heavy = sorted({name for run in runs for name in run["heavy_modules"]})
+
+    logger.info(f"{args.runs} cold starts, first request GET {args.path} -> {runs[-1]['status']}")
+    for key, value in medians.items():
+        logger.info(f"  {key:<16} {value * 1000:8.1f} ms (median)")
+    if heavy:
+        logger.warning(f"  imported eagerly: {', '.join(heavy)}")
+
+    limits = {"import_s": args.max_import, "startup_s": args.max_startup, "first_request_s": args.max_first_request}
+    over = [key for key, limit in limits.items() if medians[key] > limit]
+    if over:
+        for key in over:
+            logger.error(f"{key} {medians[key]:.3f}s exceeds {limits[key]:.3f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Convert the water quality CSV into the memory-mapped binary dataset.
+
+Usage:
+    python -m app.scripts.build_water_dataset
+    python -m app.scripts.build_water_dataset --csv path/to.csv --out path/to.gdwq
+
+After writing, the binary is re-opened and every record, name resolution and
+nearest-city lookup is checked against the in-memory store built from the
+same CSV. Exits non-zero (and removes the output) on any mismatch.
+
+Needs no database or API keys, so it can run during the image build.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from app.services.clients.water_dataset import MappedWaterQualityStore, file_sha256, write_water_dataset
+from app.services.clients.water_quality import (
+    WaterQualityStore,
+    _dataset_path,
+    binary_dataset_path,
+    read_water_quality_csv,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Offsets (degrees) applied to every city when checking nearest lookups
+_PROBE_OFFSETS = ((0.0, 0.0), (0.3, -0.2), (-0.45, 0.6))
+
+
+def validate(expected: WaterQualityStore, mapped: MappedWaterQualityStore) -> int:
+    """Count lookups where the mapped store disagrees with the in-memory one."""
+    mismatches = 0
+
+    def check(label, want, got):
+        nonlocal mismatches
+        if want != got:
+            mismatches += 1
+            logger.error(f"Mismatch for {label}: expected {want!r}, got {got!r}")
+
+    check("record count", len(expected), len(mapped))
+    for idx, record in enumerate(expected.records):
+        check(f"record {idx}", expected.match(idx, "exact"), mapped.match(idx, "exact"))
+
+        name = record.city.lower()
+        queries = {name, name[:3], name[1:-1], f"new {name}", f"{name} cantonment"}
+        for query in queries:
+            check(f"name {query!r}", expected.names.resolve(query), mapped.names.resolve(query))
+
+        for d_lat, d_lon in _PROBE_OFFSETS:
+            lat, lon = record.lat + d_lat, record.lon + d_lon
+            check(f"nearest ({lat:.2f}, {lon:.2f})",
+                  expected.spatial.nearest(lat, lon, k=3, max_distance_km=100.0),
+                  mapped.spatial.nearest(lat, lon, k=3, max_distance_km=100.0))
+
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the binary water quality dataset")
+    parser.add_argument("--csv", type=Path, default=None, help="source CSV (default: the dataset the app loads)")
+    parser.add_argument("--out", type=Path, default=None, help="output path (default: next to the CSV, .gdwq)")
+    args = parser.parse_args()
+
+    csv_path = args.csv or _dataset_path()
+    out_path = args.out or binary_dataset_path(csv_path)
+    if not csv_path.exists():
+        logger.error(f"Water quality CSV not found at {csv_path}")
+        sys.exit(1)
+
+    source_sha256 = file_sha256(csv_path)
+    store = read_water_quality_csv(csv_path)
+    write_water_dataset(store, out_path, source_sha256)
+
+    mapped = MappedWaterQualityStore(out_path, expected_sha256=source_sha256)
+    mismatches = validate(store, mapped)
+    if mismatches:
+        out_path.unlink()
+        logger.error(f"Validation failed with {mismatches} mismatches; removed {out_path}")
+        sys.exit(1)
+
+    logger.info(f"Wrote {len(store)} cities to {out_path} ({out_path.stat().st_size} bytes), validated")
+
+
+if __name__ == "__main__":
+    main()
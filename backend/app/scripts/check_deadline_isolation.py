@@ -0,0 +1,113 @@
+"""
+Check that work shared between requests is not bound by one caller's deadline.
+
+Usage:
+    python -m app.scripts.check_deadline_isolation
+
+Two concurrent callers with different budgets share one SingleFlight call,
+then one stale StaleWhileRevalidateCache entry:
+- the caller with the tiny budget gives up on its own
+- the shared call and the background refresh run with no deadline, so the
+  caller with the default budget gets the real result
+- only one upstream call is made for both callers
+
+Needs no database or API keys. Exits non-zero on any failure.
+"""
+
+import asyncio
+import logging
+import sys
+import time
+
+from app.core.cache import StaleWhileRevalidateCache
+from app.core.deadline import current_deadline, request_deadline, time_left
+from app.core.singleflight import SingleFlight
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+UPSTREAM_DELAY = 0.3
+SHORT_BUDGET = 0.05
+LONG_BUDGET = 10.0
+
+
+class _Upstream:
+    """Stands in for a provider call: fails when it sees a deadline too short for it."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch(self) -> str:
+        self.calls += 1
+        left = time_left()
+        if left is not None and left < UPSTREAM_DELAY:
+            return "degraded"
+        await asyncio.sleep(UPSTREAM_DELAY)
+        return "ok" if current_deadline() is None else "ok (under a caller's deadline)"
+
+
+async def _caller(budget: float, start_after: float, call) -> str:
+    await asyncio.sleep(start_after)
+    with request_deadline(budget):
+        try:
+            return await asyncio.wait_for(call(), timeout=time_left())
+        except asyncio.TimeoutError:
+            return "timed out"
+
+
+async def check_singleflight() -> list:
+    upstream = _Upstream()
+    flights = SingleFlight("check")
+
+    def call():
+        return flights.do("kochi", upstream.fetch)
+
+    short, long = await asyncio.gather(
+        _caller(SHORT_BUDGET, 0, call),
+        _caller(LONG_BUDGET, 0.01, call),
+    )
+    failures = []
+    if short != "timed out":
+        failures.append(f"single-flight: short-budget caller got {short!r}, expected a timeout")
+    if long != "ok":
+        failures.append(f"single-flight: default-budget caller got {long!r}, expected 'ok'")
+    if upstream.calls != 1:
+        failures.append(f"single-flight: {upstream.calls} upstream calls, expected 1")
+    return failures
+
+
+async def check_refresh() -> list:
+    upstream = _Upstream()
+    cache = StaleWhileRevalidateCache(maxsize=8, stale_ttl=60)
+    cache.set("kochi", "stale", ttl=0)
+
+    # The short-budget request finds the entry stale and schedules the refresh
+    served = await _caller(SHORT_BUDGET, 0, lambda: cache.get_or_fetch("kochi", upstream.fetch, 60))
+    started = time.monotonic()
+    while cache.stats()["refreshing"] and time.monotonic() - started < 5:
+        await asyncio.sleep(0.01)
+    refreshed = await cache.get_or_fetch("kochi", upstream.fetch, 60)
+
+    failures = []
+    if served != "stale":
+        failures.append(f"refresh: stale hit served {served!r}, expected 'stale'")
+    if refreshed != "ok":
+        failures.append(f"refresh: entry refreshed to {refreshed!r}, expected 'ok'")
+    return failures
+
+
+async def run() -> list:
+    return await check_singleflight() + await check_refresh()
+
+
+def main() -> None:
+    failures = asyncio.run(run())
+    for failure in failures:
+        logger.error(failure)
+    if failures:
+        sys.exit(1)
+    logger.info("Shared calls and background refreshes are independent of the caller's deadline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Check the rule-table heuristic engine against the original if-chain rules.
+
+Usage:
+    python -m app.scripts.check_heuristic_parity
+    python -m app.scripts.check_heuristic_parity --random 200000 --seed 7
+
+Scores every combination of values on and around each threshold, plus
+random rows, with the legacy rules, the vectorized batch path and the
+per-row path, and compares the risks. A feature
+that is None is compared with the legacy rules given no value at all
+(the legacy code raised a TypeError on None). Exits non-zero on any mismatch.
+
+Needs no database or API keys.
+"""
+
+import argparse
+import itertools
+import logging
+import random
+import sys
+import time
+
+from app.services.heuristics import score_batch, score_row
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_HUMIDITY = (None, 0, 29, 29.9, 30, 49.9, 50, 70, 70.1, 100)
+_PM25 = (None, 0, 100, 100.1, 150, 150.1, 500)
+_UV = (None, 0, 2.9, 3, 5.9, 6, 7.9, 8, 12)
+_HARDNESS = (None, 0, 200, 200.1, 250, 250.1, 300, 300.1, 600)
+_SKIN_TYPES = (None, "dry", "oily", "normal", "combination", "sensitive")
+
+
+def legacy_risks(env_data: dict, user_profile: dict) -> dict:
+    """The risk rules of get_fallback_analysis before the rule table, verbatim."""
+    if user_profile['concern'] == 'skin':
+        humidity = env_data.get('humidity', 50)
+        pm25 = env_data.get('pm25', 50)
+        uv_index = env_data.get('uv_index', 5)
+        water_hardness = env_data.get('water_hardness', 150)
+        skin_type = user_profile.get('skin_type', 'normal')
+
+        dryness = 5
+        if humidity < 30:
+            dryness += 3
+        elif humidity < 50:
+            dryness += 1
+        if pm25 > 100:
+            dryness += 1
+        if skin_type == 'dry':
+            dryness += 2
+        elif skin_type == 'oily':
+            dryness -= 2
+        dryness = max(1, min(10, dryness))
+
+        acne = 5
+        if humidity > 70:
+            acne += 2
+        if pm25 > 100:
+            acne += 1
+        if skin_type == 'oily':
+            acne += 2
+        elif skin_type == 'dry':
+            acne -= 2
+        acne = max(1, min(10, acne))
+
+        irritation = 5
+        if pm25 > 150:
+            irritation += 2
+        if water_hardness > 250:
+            irritation += 1
+        if skin_type == 'sensitive':
+            irritation += 2
+        irritation = max(1, min(10, irritation))
+
+        uv_damage = 5
+        if uv_index >= 8:
+            uv_damage += 4
+        elif uv_index >= 6:
+            uv_damage += 2
+        elif uv_index >= 3:
+            uv_damage += 1
+        if skin_type == 'sensitive':
+            uv_damage += 1
+        uv_damage = max(1, min(10, uv_damage))
+
+        pigmentation = 5
+        if uv_index >= 8:
+            pigmentation += 2
+        if pm25 > 150:
+            pigmentation += 1
+        if skin_type == 'sensitive':
+            pigmentation += 1
+        pigmentation = max(1, min(10, pigmentation))
+
+        return {
+            'dryness': dryness,
+            'acne': acne,
+            'irritation': irritation,
+            'uv_damage': uv_damage,
+            'pigmentation': pigmentation
+        }
+
+    humidity = env_data.get('humidity', 50)
+    pm25 = env_data.get('pm25', 50)
+    water_hardness = env_data.get('water_hardness', 150)
+
+    hairfall = 5
+    if water_hardness > 300:
+        hairfall += 3
+    elif water_hardness > 200:
+        hairfall += 1
+    if pm25 > 100:
+        hairfall += 1
+    hairfall = max(1, min(10, hairfall))
+
+    dandruff = 5
+    if humidity < 30:
+        dandruff += 3
+    elif humidity < 50:
+        dandruff += 1
+    if water_hardness > 250:
+        dandruff += 2
+    dandruff = max(1, min(10, dandruff))
+
+    return {'hairfall': hairfall, 'dandruff': dandruff}
+
+
+def _row(humidity, pm25, uv_index, water_hardness) -> dict:
+    return {"humidity": humidity, "pm25": pm25, "uv_index": uv_index, "water_hardness": water_hardness}
+
+
+def grid_cases():
+    for humidity, pm25, uv_index, hardness, skin_type, concern in itertools.product(
+        _HUMIDITY, _PM25, _UV, _HARDNESS, _SKIN_TYPES, ("skin", "hair")
+    ):
+        yield _row(humidity, pm25, uv_index, hardness), {"concern": concern, "skin_type": skin_type}
+
+
+def random_cases(count: int, rng: random.Random):
+    for _ in range(count):
+        row = _row(
+            rng.uniform(0, 100),
+            rng.uniform(0, 500),
+            rng.uniform(0, 12),
+            rng.uniform(0, 600),
+        )
+        profile = {"concern": rng.choice(("skin", "hair")), "skin_type": rng.choice(_SKIN_TYPES)}
+        yield row, profile
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the heuristic rule table with the legacy rules")
+    parser.add_argument("--random", type=int, default=50_000, help="number of random rows (default 50000)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cases = list(grid_cases()) + list(random_cases(args.random, random.Random(args.seed)))
+    rows = [row for row, _ in cases]
+    profiles = [profile for _, profile in cases]
+
+    started = time.perf_counter()
+    scored = score_batch(rows, profiles)
+    elapsed = time.perf_counter() - started
+
+    mismatches = 0
+    for row, profile, batch_risks in zip(rows, profiles, scored):
+        # None means "no value" to the rule table
+        want = legacy_risks({k: v for k, v in row.items() if v is not None}, profile)
+        for path, got in (("batch", batch_risks), ("row", score_row(row, profile))):
+            if want != got:
+                mismatches += 1
+                if mismatches <= 20:
+                    logger.error(f"Mismatch ({path}) for {row} {profile}: expected {want}, got {got}")
+
+    if mismatches:
+        logger.error(f"{mismatches} mismatches over {len(cases)} rows")
+        sys.exit(1)
+    logger.info(f"{len(cases)} rows match the legacy rules "
+                f"(scored in {elapsed * 1000:.1f} ms, {elapsed / len(cases) * 1e6:.2f} us/row)")
+
+
+if __name__ == "__main__":
+    main()
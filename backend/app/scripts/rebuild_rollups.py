@@ -0,0 +1,65 @@
+"""
+Repair or backfill the hourly stats rollups from the raw reports table.
+
+Usage:
+    python -m app.scripts.rebuild_rollups                 # rebuild everything
+    python -m app.scripts.rebuild_rollups --since 2026-01-01T00:00:00Z
+
+Buckets at or after --since (rounded down to the hour) are deleted and
+recomputed in one transaction, so the dashboard never sees a partial state.
+
+Safe to run against a live server: the rebuild takes the rollup advisory
+lock exclusively, which apply_report_rollups takes shared, so report writes
+wait (in the write-behind queue) until the rebuild commits. Don't run it
+while anything inserts reports without apply_report_rollups (e.g. a server
+version from before the lock existed); their increments can be lost or
+double-counted.
+"""
+
+import argparse
+import logging
+from datetime import datetime, timezone
+
+from app.db.session import SessionLocal
+from app.services.rollups import (
+    DELETE_ROLLUPS_SINCE_SQL,
+    LOCK_ROLLUPS_EXCLUSIVE_SQL,
+    REBUILD_ROLLUPS_SINCE_SQL,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _parse_since(value: str) -> datetime:
+    since = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return since.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def rebuild_rollups(since: datetime = EPOCH) -> int:
+    """Recompute rollup buckets >= since. Returns the number of rollup rows written."""
+    with SessionLocal() as db:
+        # Waits for in-flight report transactions, and holds new ones off until commit
+        db.execute(LOCK_ROLLUPS_EXCLUSIVE_SQL)
+        db.execute(DELETE_ROLLUPS_SINCE_SQL, {"since": since})
+        result = db.execute(REBUILD_ROLLUPS_SINCE_SQL, {"since": since})
+        db.commit()
+        return result.rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild hourly report rollups")
+    parser.add_argument("--since", type=_parse_since, default=EPOCH,
+                        help="ISO timestamp; only buckets from this hour on are rebuilt (default: all)")
+    args = parser.parse_args()
+
+    rows = rebuild_rollups(args.since)
+    logger.info(f"Rebuilt {rows} rollup rows since {args.since.isoformat()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,631 @@
+"""
+The analysis pipeline behind /api/analyze, shared by the single, batch and
+streaming endpoints.
+
+    geocode -> weather / air quality / water (concurrent) -> validate
+            -> data quality -> LLM risk analysis -> Report
+
+Each step is a separate function so the batch endpoint can run the
+expensive upstream steps once per unique destination / grid cell and
+share the results between items.
+
+Under a request deadline (see core.deadline) every stage only gets the time
+left: a stage that runs out is dropped (partial data), the LLM is replaced
+by the heuristic when too little time remains for it, and confidence is
+lowered one level.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from ..config import settings
+from ..core.deadline import cut_scope, cut_stages, deadline_expired, mark_cut, time_left
+from ..core.metrics import ANALYZE_STAGE_SECONDS, LLM_FALLBACKS
+from ..models.report import Report
+from ..schemas.inputs import AnalyzeRequest
+from .aqi_calculator import calculate_aqi_from_pm25
+from .clients import open_meteo, openaq
+from .clients.water_quality import lookup_water_quality
+from .data_quality import check_data_quality, degrade_confidence, validate_env_data
+from .env_cache import grid_cell
+from .geocode import geocode_place
+from .geocode_cache import normalize_place
+from .heuristics import heuristic_analysis, heuristic_analysis_batch
+from .llm_service import analyze_with_llm, stream_llm_analysis
+from .water_reloader import current_water_dataset_version
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND_COORDS = {
+    "lat": None,
+    "lon": None,
+    "display_name": "location not found"
+}
+TIMED_OUT_COORDS = {**NOT_FOUND_COORDS, "display_name": "location lookup timed out"}
+
+
+@dataclass
+class Environment:
+    """Environmental context for one destination (steps 1-6)."""
+    coords: Dict[str, Any]
+    env_report: Dict[str, Any]
+    water_quality: Optional[Dict[str, Any]]
+    is_mock_data: bool
+    missing_fields: List[str]
+    confidence: str
+
+
+@dataclass
+class Assessment:
+    """LLM (or fallback) output for one request (step 7)."""
+    risks: Dict[str, Any]
+    recommendations: List[Any]
+    explanations: Dict[str, Any]
+
+
+async def _run_stage(name: str, coro: Awaitable[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    Await a single pipeline stage, turning a failure into a missing result
+    so one provider can't take down its siblings in the fan-out.
+    The stage gets whatever is left of the request deadline.
+    """
+    try:
+        with ANALYZE_STAGE_SECONDS.labels(name).time():
+            result = await asyncio.wait_for(coro, timeout=time_left())
+    except asyncio.TimeoutError:
+        logger.warning(f"Pipeline stage '{name}' cut off by the request deadline")
+        mark_cut(name)
+        return None
+    except Exception as e:
+        logger.error(f"Pipeline stage '{name}' failed: {e}")
+        result = None
+    return result
+
+
+async def _lookup_water(destination: str, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    """
+    Water lookup is an in-memory index probe, so it runs on the loop while the
+    HTTP stages are awaiting their responses.
+    """
+    return lookup_water_quality(
+        city=destination,
+        lat=lat,
+        lon=lon,
+        max_distance_km=100.0
+    )
+
+
+async def geocode_destination(destination: str) -> Dict[str, Any]:
+    """Step 1: coords for a destination (every other stage depends on them)."""
+    try:
+        with ANALYZE_STAGE_SECONDS.labels("geocode").time():
+            geocode_result = await asyncio.wait_for(geocode_place(destination), timeout=time_left())
+    except asyncio.TimeoutError:
+        geocode_result = None
+    if not geocode_result:
+        if deadline_expired():
+            logger.warning(f"Geocoding '{destination}' cut off by the request deadline")
+            mark_cut("geocode")
+            return dict(TIMED_OUT_COORDS)
+        return dict(NOT_FOUND_COORDS)
+    return {
+        "lat": geocode_result["lat"],
+        "lon": geocode_result["lon"],
+        "display_name": geocode_result["display_name"]
+    }
+
+
+async def fetch_conditions(lat: float, lon: float) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Steps 2-3: weather + UV and air quality, which only depend on the grid cell."""
+    weather, aqi_data = await asyncio.gather(
+        _run_stage("weather", open_meteo.fetch_weather_and_uv(lat, lon)),
+        _run_stage("air_quality", openaq.fetch_aqi_nearby(lat, lon)),
+    )
+    return weather, aqi_data
+
+
+def weather_fields(weather: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Step 2: Weather + UV"""
+    if not weather:
+        return {}
+    return {
+        "temperature_c": weather.get("temperature_c"),
+        "humidity":  weather.get("humidity"),
+        "uv_index": weather.get("uv_index")
+    }
+
+
+def air_quality_fields(aqi_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Steps 3-4: nearby AQ measurements, with AQI derived from PM2.5 if the API didn't provide it"""
+    if not aqi_data:
+        return {}
+    fields = {
+        "aqi": aqi_data.get("us_aqi"),
+        "pm25": aqi_data.get("pm2_5"),
+        "pm10": aqi_data.get("pm10"),
+        "NO2": aqi_data.get("nitrogen_dioxide"),
+        "O3": aqi_data.get("ozone")
+    }
+    if fields["aqi"] is None and fields["pm25"] is not None:
+        calculated_aqi = calculate_aqi_from_pm25(fields["pm25"])
+        if calculated_aqi:
+            fields["aqi"] = calculated_aqi
+    return fields
+
+
+def water_fields(water_quality: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Step 4.5: Water quality data"""
+    if not water_quality:
+        return {}
+    return {
+        "water_hardness":  water_quality.get("hardness_mg_l"),
+        "water_ph": water_quality.get("ph"),
+        "water_tds": water_quality.get("tds_mg_l"),
+        "water_chlorine": water_quality.get("chlorine_mg_l"),
+        "water_source":  water_quality.get("source_type"),
+        "water_match_type": water_quality.get("match_type"),
+        "water_distance_km": water_quality.get("distance_km")
+    }
+
+
+def _merge_environment(
+    env_report: Dict[str, Any],
+    destination: str,
+    weather: Optional[Dict[str, Any]],
+    aqi_data: Optional[Dict[str, Any]],
+    water_quality: Optional[Dict[str, Any]]
+) -> None:
+    """
+    Merge the fanned-out stage results into env_report.
+    Missing stages simply leave their fields out, which is what
+    check_data_quality relies on to flag mock data.
+    """
+    env_report.update(weather_fields(weather))
+    env_report.update(air_quality_fields(aqi_data))
+    env_report.update(water_fields(water_quality))
+
+    if water_quality:
+        logger.info(f"Water quality data:  {water_quality.get('match_type')} match for {destination}")
+    else:
+        logger.warning(f"No water quality data found for {destination}")
+
+
+def build_environment(
+    destination: str,
+    coords: Dict[str, Any],
+    weather: Optional[Dict[str, Any]],
+    aqi_data: Optional[Dict[str, Any]],
+    water_quality: Optional[Dict[str, Any]]
+) -> Environment:
+    """Steps 4-6: merge stage results, validate, and score data quality."""
+    env_report = {"coords": coords}
+    if coords.get("lat") is not None and coords.get("lon") is not None:
+        _merge_environment(env_report, destination, weather, aqi_data, water_quality)
+
+    with ANALYZE_STAGE_SECONDS.labels("validation").time():
+        # Step 5: Validate and clean environmental data
+        env_report = validate_env_data(env_report)
+
+        # Step 6: Check data quality
+        is_mock_data, missing_fields, confidence = check_data_quality(env_report)
+    return Environment(coords, env_report, water_quality, is_mock_data, missing_fields, confidence)
+
+
+async def gather_environment(destination: str) -> Environment:
+    """Steps 1-6 for a single destination."""
+    coords = await geocode_destination(destination)
+    lat, lon = coords["lat"], coords["lon"]
+    weather = aqi_data = water_quality = None
+
+    # Steps 2-4.5: weather, AQ and water only need lat/lon, so fan them out concurrently
+    if lat is not None and lon is not None:
+        (weather, aqi_data), water_quality = await asyncio.gather(
+            fetch_conditions(lat, lon),
+            _run_stage("water", _lookup_water(destination, lat, lon)),
+        )
+    return build_environment(destination, coords, weather, aqi_data, water_quality)
+
+
+def _user_profile(payload: AnalyzeRequest) -> Dict[str, Any]:
+    return {
+        'concern': payload.concern,
+        'skin_type':  payload.skin_type,
+        'hair_type': payload.hair_type,
+        'duration_category': payload.duration_category
+    }
+
+
+def _assessment_from(llm_result: Dict[str, Any], payload: AnalyzeRequest) -> Assessment:
+    risks = llm_result. get('risks', {})
+    recommendations = llm_result.get('recommendations', [])
+    explanations = llm_result.get('explanations', {
+        'why': [
+            f"Environmental analysis completed for {payload.destination}",
+            f"Risk assessment based on current conditions",
+            "Recommendations tailored to your profile"
+        ]
+    })
+    logger.info(f"Risk analysis complete.  Risks: {risks}")
+    return Assessment(risks, recommendations, explanations)
+
+
+# If everything fails, return basic response
+_UNAVAILABLE = Assessment(
+    risks={"error": "Unable to calculate risks"},
+    recommendations=["Please try again later"],
+    explanations={"why": ["Analysis service temporarily unavailable"]}
+)
+
+
+def heuristic_assessment(payload: AnalyzeRequest, env: Environment) -> Assessment:
+    """Step 7 for mode="fast": the heuristic rule table, no LLM."""
+    return _assessment_from(heuristic_analysis(env.env_report, _user_profile(payload)), payload)
+
+
+def _llm_has_time() -> bool:
+    """False when the request deadline leaves less than LLM_MIN_BUDGET seconds."""
+    remaining = time_left()
+    if remaining is None or remaining >= settings.LLM_MIN_BUDGET:
+        return True
+    logger.warning(f"Only {remaining:.2f}s left of the request deadline, using heuristic analysis")
+    mark_cut("llm")
+    LLM_FALLBACKS.labels("deadline").inc()
+    return False
+
+
+async def assess(payload: AnalyzeRequest, env: Environment) -> Assessment:
+    """Step 7: risk analysis with the Groq LLM (heuristic fallback inside)."""
+    if payload.mode == "fast" or not _llm_has_time():
+        return heuristic_assessment(payload, env)
+    try:
+        logger.info("Starting LLM-based risk analysis...")
+        with ANALYZE_STAGE_SECONDS.labels("llm").time():
+            llm_result = await analyze_with_llm(env_data=env.env_report, user_profile=_user_profile(payload))
+        return _assessment_from(llm_result, payload)
+    except Exception as e:
+        logger.error(f"Risk analysis failed: {e}")
+        LLM_FALLBACKS.labels("unavailable").inc()
+        return _UNAVAILABLE
+
+
+async def stream_assessment(payload: AnalyzeRequest, env: Environment) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Step 7, streamed: passes through the LLM's risks / recommendation /
+    explanations / fallback events as they arrive, then yields
+    ("assessment", Assessment).
+    """
+    fast = payload.mode == "fast"
+    if fast or not _llm_has_time():
+        assessment = heuristic_assessment(payload, env)
+        if not fast:
+            yield "fallback", {"reason": "deadline"}
+        yield "risks", assessment.risks
+        for recommendation in assessment.recommendations:
+            yield "recommendation", recommendation
+        yield "explanations", assessment.explanations
+        yield "assessment", assessment
+        return
+
+    llm_result = None
+    try:
+        logger.info("Starting streamed LLM-based risk analysis...")
+        # Includes the time the client takes to read the forwarded events
+        with ANALYZE_STAGE_SECONDS.labels("llm").time():
+            async for kind, value in stream_llm_analysis(env.env_report, _user_profile(payload)):
+                if kind == "result":
+                    llm_result = value
+                else:
+                    yield kind, value
+    except Exception as e:
+        logger.error(f"Risk analysis failed: {e}")
+
+    if llm_result is None:
+        LLM_FALLBACKS.labels("unavailable").inc()
+        yield "fallback", {"reason": "unavailable"}
+        yield "risks", _UNAVAILABLE.risks
+        for recommendation in _UNAVAILABLE.recommendations:
+            yield "recommendation", recommendation
+        yield "explanations", _UNAVAILABLE.explanations
+        yield "assessment", _UNAVAILABLE
+        return
+    yield "assessment", _assessment_from(llm_result, payload)
+
+
+def _confidence(env: Environment) -> str:
+    """Data quality confidence, one level lower when the request deadline cut any stage."""
+    return degrade_confidence(env.confidence) if cut_stages() else env.confidence
+
+
+def build_report(payload: AnalyzeRequest, env: Environment, assessment: Assessment) -> Report:
+    """Step 8: the Report row persisted for model training."""
+    coords, env_report = env.coords, env.env_report
+    return Report(
+        source_version=settings.SOURCE_VERSION,
+        destination=payload.destination,
+        home_city=payload.home_city,
+        duration_category=payload.duration_category,
+        month_or_season=payload.month_or_season,
+        concern=payload.concern,
+        skin_type=payload.skin_type,
+        hair_type=payload.hair_type,
+        destination_lat=coords. get("lat"),
+        destination_lon=coords.get("lon"),
+        destination_display_name=coords.get("display_name"),
+        temperature_c=env_report.get("temperature_c"),
+        humidity=env_report.get("humidity"),
+        uv_index=env_report.get("uv_index"),
+        pm25=env_report.get("pm25"),
+        pm10=env_report.get("pm10"),
+        no2=env_report.get("NO2"),
+        o3=env_report. get("O3"),
+        aqi=env_report.get("aqi"),
+        water_hardness=env_report.get("water_hardness"),
+        water_ph=env_report.get("water_ph"),
+        water_tds=env_report.get("water_tds"),
+        water_chlorine=env_report. get("water_chlorine"),
+        # the version the lookup actually used, even if a reload happened since
+        water_dataset_version=(env.water_quality or {}).get("dataset_version") or current_water_dataset_version(),
+        risks=assessment.risks,
+        is_mock_data=env.is_mock_data,
+        missing_fields=env.missing_fields if env.missing_fields else None,
+        confidence=_confidence(env)
+    )
+
+
+def build_response(payload: AnalyzeRequest, env: Environment, assessment: Assessment) -> Dict[str, Any]:
+    """Step 9: the /api/analyze response body."""
+    return {
+        "request": payload. dict(),
+        "env_report": env.env_report,
+        "risks": assessment.risks,
+        "recommendations":  assessment.recommendations,
+        "explanations":  assessment.explanations,
+        "confidence":  _confidence(env),
+        "data_quality":  {
+            "is_mock_data": env.is_mock_data,
+            "missing_fields": env.missing_fields,
+            "timed_out_stages": cut_stages()
+        }
+    }
+
+
+async def analyze_destination(payload: AnalyzeRequest) -> Tuple[Dict[str, Any], Report]:
+    """Run the whole pipeline for one request. Returns (response body, unsaved Report)."""
+    env = await gather_environment(payload.destination)
+    assessment = await assess(payload, env)
+    return build_response(payload, env, assessment), build_report(payload, env, assessment)
+
+
+# ---------------------------------------------------------------------------
+# Streaming
+# ---------------------------------------------------------------------------
+
+# Internal event carrying the finished Report; never sent to the client
+REPORT_EVENT = "_report"
+
+
+async def stream_analysis(payload: AnalyzeRequest) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Run the pipeline for one request, yielding (event, data) as each stage
+    finishes: coords, then weather / air_quality / water in completion
+    order, data_quality, risks, one recommendation event per item (as the
+    LLM streams them), explanations, and finally complete (the /api/analyze
+    response body). A fallback event means the LLM answer was abandoned.
+    The last event is REPORT_EVENT with the unsaved Report.
+    """
+    destination = payload.destination
+    coords = await geocode_destination(destination)
+    yield "coords", coords
+
+    stages = {"weather": None, "air_quality": None, "water": None}
+    lat, lon = coords["lat"], coords["lon"]
+    if lat is not None and lon is not None:
+        async def tagged(name: str, coro: Awaitable[Optional[Dict[str, Any]]]):
+            return name, await _run_stage(name, coro)
+
+        tasks = [
+            asyncio.ensure_future(tagged("weather", open_meteo.fetch_weather_and_uv(lat, lon))),
+            asyncio.ensure_future(tagged("air_quality", openaq.fetch_aqi_nearby(lat, lon))),
+            asyncio.ensure_future(tagged("water", _lookup_water(destination, lat, lon))),
+        ]
+        to_fields = {"weather": weather_fields, "air_quality": air_quality_fields, "water": water_fields}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                name, result = await next_done
+                stages[name] = result
+                yield name, to_fields[name](result) or None
+        finally:
+            # The client may disconnect mid-stream
+            for task in tasks:
+                task.cancel()
+
+    env = build_environment(destination, coords, stages["weather"], stages["air_quality"], stages["water"])
+    yield "data_quality", {
+        "env_report": env.env_report,
+        "confidence": _confidence(env),
+        "is_mock_data": env.is_mock_data,
+        "missing_fields": env.missing_fields,
+        "timed_out_stages": cut_stages()
+    }
+
+    # Risks and recommendations are forwarded while the LLM is still writing.
+    # After a fallback event, the fallback's risks and recommendations
+    # (numbered from 0 again) replace whatever was sent before.
+    assessment = None
+    index = 0
+    async for kind, value in stream_assessment(payload, env):
+        if kind == "assessment":
+            assessment = value
+        elif kind == "recommendation":
+            yield kind, {"index": index, "text": value}
+            index += 1
+        else:
+            if kind == "fallback":
+                index = 0
+            yield kind, value
+
+    yield "complete", build_response(payload, env, assessment)
+    yield REPORT_EVENT, build_report(payload, env, assessment)
+
+
+# ---------------------------------------------------------------------------
+# Batch
+# ---------------------------------------------------------------------------
+
+def destination_key(destination: str) -> str:
+    """Destinations that geocode identically (same normalized cache key)."""
+    return normalize_place(destination)
+
+
+def count_unique_destinations(items: Sequence[AnalyzeRequest]) -> int:
+    return len({destination_key(item.destination) for item in items})
+
+
+def _error_message(error: BaseException) -> str:
+    return str(error) or type(error).__name__
+
+
+async def analyze_batch(
+    items: Sequence[AnalyzeRequest],
+    max_concurrency: int
+) -> Tuple[List[Dict[str, Any]], List[Report], Dict[str, int]]:
+    """
+    Analyze many requests, sharing upstream work:
+    - geocoding and the water lookup run once per unique destination
+    - weather / air quality run once per unique grid cell
+    - the LLM runs once per unique request (identical items share a result)
+    - mode="fast" requests are scored together in one heuristic batch
+
+    At most max_concurrency geocodes, grid cells or LLM calls run at once.
+    A grid cell fetches weather and air quality together, so up to twice
+    as many upstream requests can be in flight. A failure only fails the
+    items that depend on it.
+
+    Under a request deadline every item shares the batch's budget, but an
+    item's timed_out_stages (and lowered confidence) only list the stages
+    it depends on.
+
+    Returns (per-item results in input order, reports to persist, summary).
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(coro, cuts: List[str]):
+        with cut_scope(cuts):
+            async with semaphore:
+                return await coro
+
+    async def run_all(keys: List[Hashable], make, cuts: Dict[Hashable, List[str]]) -> Dict[Hashable, Any]:
+        outcomes = await asyncio.gather(
+            *(bounded(make(key), cuts.setdefault(key, [])) for key in keys),
+            return_exceptions=True
+        )
+        return dict(zip(keys, outcomes))
+
+    # Stages cut by the deadline, per destination / grid cell / request
+    dest_cuts: Dict[Hashable, List[str]] = {}
+    cell_cuts: Dict[Hashable, List[str]] = {}
+    request_cuts: Dict[Hashable, List[str]] = {}
+
+    # Unique destinations (first spelling wins) -> coords
+    destinations: Dict[str, str] = {}
+    for item in items:
+        destinations.setdefault(destination_key(item.destination), item.destination)
+    coords_by_dest = await run_all(
+        list(destinations), lambda key: geocode_destination(destinations[key]), dest_cuts
+    )
+
+    # Unique grid cells -> (weather, aqi)
+    cell_points: Dict[Tuple[int, int], Tuple[float, float]] = {}
+    cell_by_dest: Dict[str, Tuple[int, int]] = {}
+    for key, coords in coords_by_dest.items():
+        if isinstance(coords, BaseException) or coords["lat"] is None or coords["lon"] is None:
+            continue
+        cell = grid_cell(coords["lat"], coords["lon"])
+        cell_by_dest[key] = cell
+        cell_points.setdefault(cell, (coords["lat"], coords["lon"]))
+    conditions = await run_all(list(cell_points), lambda cell: fetch_conditions(*cell_points[cell]), cell_cuts)
+
+    # Per destination: water lookup (in memory) + merge
+    environments: Dict[str, Any] = {}
+    for key, coords in coords_by_dest.items():
+        if isinstance(coords, BaseException):
+            environments[key] = coords
+            continue
+        try:
+            weather = aqi_data = water_quality = None
+            if key in cell_by_dest:
+                cell_result = conditions[cell_by_dest[key]]
+                if isinstance(cell_result, BaseException):
+                    raise cell_result
+                weather, aqi_data = cell_result
+                with cut_scope(dest_cuts[key]):
+                    water_quality = await _run_stage(
+                        "water", _lookup_water(destinations[key], coords["lat"], coords["lon"])
+                    )
+            environments[key] = build_environment(destinations[key], coords, weather, aqi_data, water_quality)
+        except Exception as e:
+            environments[key] = e
+
+    # Unique requests -> assessment
+    requests: Dict[Tuple, AnalyzeRequest] = {}
+    request_keys = []
+    for item in items:
+        request_key = tuple(sorted(item.dict().items()))
+        requests.setdefault(request_key, item)
+        request_keys.append(request_key)
+
+    async def assess_request(request_key: Tuple) -> Assessment:
+        item = requests[request_key]
+        env = environments[destination_key(item.destination)]
+        if isinstance(env, BaseException):
+            raise env
+        return await assess(item, env)
+
+    assessments: Dict[Hashable, Any] = {}
+    fast_keys = []
+    for request_key, item in requests.items():
+        if item.mode != "fast":
+            continue
+        env = environments[destination_key(item.destination)]
+        if isinstance(env, BaseException):
+            assessments[request_key] = env
+        else:
+            fast_keys.append(request_key)
+    fast_items = [requests[key] for key in fast_keys]
+    fast_results = heuristic_analysis_batch(
+        [environments[destination_key(item.destination)].env_report for item in fast_items],
+        [_user_profile(item) for item in fast_items]
+    )
+    for request_key, item, result in zip(fast_keys, fast_items, fast_results):
+        assessments[request_key] = _assessment_from(result, item)
+
+    assessments.update(
+        await run_all([key for key in requests if key not in assessments], assess_request, request_cuts)
+    )
+
+    results: List[Dict[str, Any]] = []
+    reports: List[Report] = []
+    for index, (item, request_key) in enumerate(zip(items, request_keys)):
+        outcome = assessments[request_key]
+        if isinstance(outcome, BaseException):
+            logger.error(f"Batch item {index} ({item.destination}) failed: {outcome}")
+            results.append({"index": index, "status": "error", "error": _error_message(outcome)})
+            continue
+        key = destination_key(item.destination)
+        env = environments[key]
+        item_cuts = dest_cuts[key] + cell_cuts.get(cell_by_dest.get(key), []) + request_cuts.get(request_key, [])
+        with cut_scope(list(dict.fromkeys(item_cuts))):
+            results.append({"index": index, "status": "ok", "result": build_response(item, env, outcome)})
+            reports.append(build_report(item, env, outcome))
+
+    summary = {
+        "items": len(items),
+        "unique_destinations": len(destinations),
+        "unique_cells": len(cell_points),
+        "unique_requests": len(requests),
+        "succeeded": len(reports),
+        "failed": len(items) - len(reports)
+    }
+    return results, reports, summary
@@ -0,0 +1,96 @@
+"""
+Periodic purge of expired rows from the persistent cache tables.
+
+Cache keys come from user input (any destination string, including ones
+that are negatively cached as "not found"), so without a purge the tables
+grow without bound: lookups ignore expired rows but nothing deletes them.
+A background task deletes them every CACHE_PRUNE_INTERVAL seconds, in
+batches of PRUNE_BATCH_SIZE rows so no single statement holds locks for
+long. Every worker runs one; concurrent purges just find less to delete.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select
+
+from ..config import settings
+from ..db.session import AsyncSessionLocal
+from ..models.geocode_cache import GeocodeCacheEntry
+from ..models.llm_cache import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Tables with a `key` primary key and an indexed `expires_at`
+PRUNED_MODELS = (GeocodeCacheEntry, LLMCacheEntry)
+
+PRUNE_BATCH_SIZE = 1000
+
+
+class CachePruner:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.deleted: Dict[str, int] = {model.__tablename__: 0 for model in PRUNED_MODELS}
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    async def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="cache-pruner")
+            logger.info(f"Pruning expired cache rows every {self.interval:g}s")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.prune_now()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                logger.error(f"Cache pruning failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def prune_now(self) -> int:
+        """Delete every expired row from each cache table. Returns the number deleted."""
+        now = datetime.now(timezone.utc)
+        total = 0
+        for model in PRUNED_MODELS:
+            expired = select(model.key).where(model.expires_at < now).limit(PRUNE_BATCH_SIZE)
+            while True:
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(delete(model).where(model.key.in_(expired.scalar_subquery())))
+                    await db.commit()
+                self.deleted[model.__tablename__] += result.rowcount
+                total += result.rowcount
+                if result.rowcount < PRUNE_BATCH_SIZE:
+                    break
+        self.runs += 1
+        if total:
+            logger.info(f"Pruned {total} expired cache row(s)")
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval": self.interval,
+            "runs": self.runs,
+            "deleted": dict(self.deleted),
+            "errors": self.errors,
+            "last_error": self.last_error
+        }
+
+
+cache_pruner = CachePruner(interval=settings.CACHE_PRUNE_INTERVAL)
@@ -1,55 +1,111 @@
-import httpx
-import asyncio
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from ...config import settings
+from ...core.upstream import get_json
+from ..env_cache import cached_by_cell, cell_key, env_cache
 
 BASE = str(settings.OPEN_METEO_BASE).rstrip("/")
 
-async def _get_with_retries(client: httpx.AsyncClient, url: str, params: Dict[str, Any], retries: int = 2, delay: float = 0.5):
-    last_exc = None
-    for attempt in range(retries + 1):
-        try:
-            resp = await client.get(url, params=params)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as exc:
-            last_exc = exc
-            if attempt < retries:
-                await asyncio.sleep(delay * (attempt + 1))
-            else:
-                raise last_exc
-
 async def fetch_weather_and_uv(lat:  float, lon: float) -> Optional[Dict[str, Any]]:
     """
-    Query Open-Meteo for current weather data only.
-    Returns normalized dict with current conditions. 
+    Query Open-Meteo for current weather plus the daily UV maximum.
+    Returns a normalized dict, or None when neither could be fetched.
+
+    Current conditions and the daily UV maximum update on different
+    cadences, so they're cached per grid cell with separate TTLs. A cold
+    cell is filled by one request for both; after that each is refreshed
+    on its own TTL.
     """
+    current = await cached_by_cell(
+        "weather_current", lat, lon, lambda: _fetch_current_for_cell(lat, lon), settings.WEATHER_CACHE_TTL
+    )
+    uv_index = await cached_by_cell(
+        "uv_daily", lat, lon, lambda: _fetch_daily_uv(lat, lon), settings.UV_CACHE_TTL
+    )
+    if current is None and uv_index is None:
+        return None
+
+    current = current or {}
+    return {
+        "temperature_c":  current.get("temperature_c"),
+        "humidity": current.get("humidity"),
+        "uv_index": uv_index.get("uv_index") if uv_index else None
+    }
+
+
+async def _fetch_current_for_cell(lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    """
+    Current conditions for a cell. If its UV entry is missing too, both come
+    from a single forecast request and the UV entry is stored on the way.
+    """
+    if env_cache.contains(cell_key("uv_daily", lat, lon)):
+        return await _fetch_current(lat, lon)
+    current, uv_index = await _fetch_current_and_uv(lat, lon)
+    env_cache.set(cell_key("uv_daily", lat, lon), uv_index, settings.UV_CACHE_TTL)
+    return current
+
+
+def _parse_current(data: Dict[str, Any]) -> Dict[str, Any]:
+    current = data.get("current", {})
+    return {
+        "temperature_c":  current.get("temperature_2m"),
+        "humidity": current.get("relative_humidity_2m")
+    }
+
+
+def _parse_daily_uv(data: Dict[str, Any]) -> Dict[str, Any]:
+    daily = data.get("daily", {})
+    uv_index = None
+    if daily and "uv_index_max" in daily and len(daily["uv_index_max"]) > 0:
+        uv_index = daily["uv_index_max"][0]
+    return {"uv_index": uv_index}
+
+
+async def _fetch_current_and_uv(lat: float, lon: float) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
     params = {
         "latitude": lat,
         "longitude":  lon,
         "current":  "temperature_2m,relative_humidity_2m",
         "daily": "uv_index_max",
+        "forecast_days": 1,
+        "timezone": "auto"
+    }
+    url = f"{BASE}/forecast"
+
+    try:
+        data = await get_json("open_meteo", url, params)
+        return _parse_current(data), _parse_daily_uv(data)
+    except Exception:
+        return None, None
+
+
+async def _fetch_current(lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    params = {
+        "latitude": lat,
+        "longitude":  lon,
+        "current":  "temperature_2m,relative_humidity_2m",
+        "timezone": "auto"
+    }
+    url = f"{BASE}/forecast"
+    
+    try:
+        data = await get_json("open_meteo", url, params)
+        return _parse_current(data)
+    except Exception: 
+        return None
+
+
+async def _fetch_daily_uv(lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    params = {
+        "latitude": lat,
+        "longitude":  lon,
+        "daily": "uv_index_max",
+        "forecast_days": 1,
         "timezone": "auto"
     }
     url = f"{BASE}/forecast"
-    timeout = settings.HTTP_TIMEOUT
-    headers = {"User-Agent": f"{settings.APP_NAME} (dev)"}
     
-    async with httpx.AsyncClient(timeout=timeout, headers=headers) as client:
-        try:
-            data = await _get_with_retries(client, url, params)
-            current = data.get("current", {})
-            daily = data.get("daily", {})
-            uv_index = None
-            if daily and "uv_index_max" in daily and len(daily["uv_index_max"]) > 0:
-                uv_index = daily["uv_index_max"][0]
-
-            print(uv_index)
-            
-            return {
-                "temperature_c":  current.get("temperature_2m"),
-                "humidity": current.get("relative_humidity_2m"),
-                "uv_index": uv_index
-            }
-        except Exception: 
-            return None
\ No newline at end of file
+    try:
+        data = await get_json("open_meteo", url, params)
+        return _parse_daily_uv(data)
+    except Exception: 
+        return None
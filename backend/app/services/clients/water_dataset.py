@@ -0,0 +1,338 @@
+"""
+Versioned binary format for the water quality dataset.
+
+The file holds fixed-width records plus the name and spatial indexes, laid
+out so it can be memory-mapped read-only: every worker shares one page-cache
+copy and starts without parsing anything.
+
+Layout (little-endian):
+    header    HEADER, then 7 (offset, count) section descriptors
+    strings   UTF-8 blob, referenced as (offset u32, length u16)
+    records   RECORD * record_count
+    exact     EXACT  * n, sorted by lowercased name (UTF-8 byte order)
+    grams     GRAM   * n, sorted by gram
+    postings  u32 record indexes referenced by grams
+    cells     CELL   * n, sorted by cell key
+    members   u32 record indexes referenced by cells
+
+Build it with `python -m app.scripts.build_water_dataset`.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..name_index import NameIndexBase
+from ..spatial_index import GridIndexBase
+
+MAGIC = b"GDWQBIN\x00"
+FORMAT_VERSION = 1
+
+# magic, format version, reserved, record count, grid cell size, source sha256
+HEADER = struct.Struct("<8sHHId32s")
+SECTION = struct.Struct("<QQ")
+SECTIONS = ("strings", "records", "exact", "grams", "postings", "cells", "members")
+
+# city, state, source_type, reliability as (str offset, str length);
+# lat, lon, hardness_mg_l, ph, tds_mg_l, chlorine_mg_l
+RECORD = struct.Struct("<IHIHIHIHddidid")
+_LATLON = struct.Struct("<dd")
+_LATLON_OFFSET = 24
+EXACT = struct.Struct("<IHI")
+GRAM = struct.Struct("<IHII")
+CELL = struct.Struct("<III")
+U32 = struct.Struct("<I")
+
+# Bytes per counted element of each section (strings are counted in bytes)
+SECTION_ITEM_SIZES = {
+    "strings": 1,
+    "records": RECORD.size,
+    "exact": EXACT.size,
+    "grams": GRAM.size,
+    "postings": U32.size,
+    "cells": CELL.size,
+    "members": U32.size,
+}
+
+
+class WaterDatasetError(Exception):
+    """The binary dataset is missing, corrupt, stale or an unknown version."""
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+class _StringTable:
+    def __init__(self):
+        self._blob = bytearray()
+        self._offsets: Dict[bytes, int] = {}
+
+    def add(self, text: str) -> Tuple[int, int]:
+        data = text.encode("utf-8")
+        if data not in self._offsets:
+            self._offsets[data] = len(self._blob)
+            self._blob += data
+        return self._offsets[data], len(data)
+
+    def __bytes__(self) -> bytes:
+        return bytes(self._blob)
+
+
+def write_water_dataset(store, out_path: Path, source_sha256: str) -> None:
+    """
+    Serialize an in-memory WaterQualityStore. The file is written next to
+    out_path and renamed into place, so readers never see a partial file.
+    """
+    strings = _StringTable()
+
+    records = bytearray()
+    for record in store.records:
+        result = record.result
+        records += RECORD.pack(
+            *strings.add(record.city),
+            *strings.add(record.state),
+            *strings.add(result["source_type"]),
+            *strings.add(result["reliability"]),
+            record.lat, record.lon,
+            result["hardness_mg_l"], result["ph"],
+            result["tds_mg_l"], result["chlorine_mg_l"]
+        )
+
+    exact_entries = sorted(store.names.exact_entries(), key=lambda item: item[0].encode("utf-8"))
+    exact = b"".join(EXACT.pack(*strings.add(name), idx) for name, idx in exact_entries)
+
+    grams = bytearray()
+    postings: List[int] = []
+    gram_entries = sorted(store.names.posting_entries(), key=lambda item: item[0].encode("utf-8"))
+    for gram, ids in gram_entries:
+        grams += GRAM.pack(*strings.add(gram), len(postings), len(ids))
+        postings.extend(ids)
+
+    cells = bytearray()
+    members: List[int] = []
+    cell_entries = store.spatial.cells()
+    for key, ids in cell_entries:
+        cells += CELL.pack(key, len(members), len(ids))
+        members.extend(ids)
+
+    blobs = [
+        (bytes(strings), len(bytes(strings))),
+        (bytes(records), len(store.records)),
+        (exact, len(exact_entries)),
+        (bytes(grams), len(gram_entries)),
+        (struct.pack(f"<{len(postings)}I", *postings), len(postings)),
+        (bytes(cells), len(cell_entries)),
+        (struct.pack(f"<{len(members)}I", *members), len(members)),
+    ]
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(store.records),
+                         store.spatial.cell_deg, bytes.fromhex(source_sha256))
+    offset = HEADER.size + SECTION.size * len(SECTIONS)
+    descriptors = b""
+    for blob, count in blobs:
+        # 8-byte align every section so u32 arrays can be cast in place
+        offset += -offset % 8
+        descriptors += SECTION.pack(offset, count)
+        offset += len(blob)
+
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header + descriptors)
+        for blob, _ in blobs:
+            f.write(b"\x00" * (-f.tell() % 8))
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, out_path)
+
+
+# ---------------------------------------------------------------------------
+# Memory-mapped reader
+# ---------------------------------------------------------------------------
+
+def _bisect(count: int, key_at, target) -> Optional[int]:
+    """Binary search a sorted table; returns the row number or None."""
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        key = key_at(mid)
+        if key < target:
+            lo = mid + 1
+        elif key > target:
+            hi = mid
+        else:
+            return mid
+    return None
+
+
+class _MappedTables:
+    """Section views over the mapped file."""
+
+    def __init__(self, buf: memoryview, sections: Dict[str, Tuple[int, int]]):
+        self.buf = buf
+        self.sections = sections
+        self.strings_off = sections["strings"][0]
+
+    def string(self, offset: int, length: int) -> str:
+        start = self.strings_off + offset
+        return str(self.buf[start:start + length], "utf-8")
+
+    def string_bytes(self, offset: int, length: int) -> bytes:
+        start = self.strings_off + offset
+        return self.buf[start:start + length].tobytes()
+
+    def row(self, section: str, layout: struct.Struct, i: int) -> tuple:
+        return layout.unpack_from(self.buf, self.sections[section][0] + i * layout.size)
+
+    def u32_slice(self, section: str, start: int, count: int) -> Sequence[int]:
+        begin = self.sections[section][0] + start * U32.size
+        return self.buf[begin:begin + count * U32.size].cast("I")
+
+
+class MappedNameIndex(NameIndexBase):
+    def __init__(self, tables: _MappedTables, record_count: int, memo_size: int = 4096):
+        super().__init__(memo_size)
+        self._tables = tables
+        self._count = record_count
+        self._exact_count = tables.sections["exact"][1]
+        self._gram_count = tables.sections["grams"][1]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _name(self, idx: int) -> str:
+        city_off, city_len = self._tables.row("records", RECORD, idx)[:2]
+        return self._tables.string(city_off, city_len).lower()
+
+    def _exact_lookup(self, name: str) -> Optional[int]:
+        target = name.encode("utf-8")
+        row = _bisect(self._exact_count, lambda i: self._tables.string_bytes(*self._tables.row("exact", EXACT, i)[:2]), target)
+        return None if row is None else self._tables.row("exact", EXACT, row)[2]
+
+    def _posting(self, gram: str) -> Optional[Sequence[int]]:
+        target = gram.encode("utf-8")
+        row = _bisect(self._gram_count, lambda i: self._tables.string_bytes(*self._tables.row("grams", GRAM, i)[:2]), target)
+        if row is None:
+            return None
+        _, _, start, count = self._tables.row("grams", GRAM, row)
+        return self._tables.u32_slice("postings", start, count)
+
+
+class MappedGeoGridIndex(GridIndexBase):
+    def __init__(self, tables: _MappedTables, record_count: int, cell_deg: float):
+        super().__init__(cell_deg)
+        self._tables = tables
+        self._count = record_count
+        self._cell_count = tables.sections["cells"][1]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _point(self, idx: int) -> Tuple[float, float]:
+        offset = self._tables.sections["records"][0] + idx * RECORD.size + _LATLON_OFFSET
+        return _LATLON.unpack_from(self._tables.buf, offset)
+
+    def _cell_members(self, cell: Tuple[int, int]) -> Sequence[int]:
+        key = cell[0] * self._lon_cells + cell[1]
+        row = _bisect(self._cell_count, lambda i: self._tables.row("cells", CELL, i)[0], key)
+        if row is None:
+            return ()
+        _, start, count = self._tables.row("cells", CELL, row)
+        return self._tables.u32_slice("members", start, count)
+
+
+class MappedWaterQualityStore:
+    """
+    Read-only, memory-mapped counterpart of WaterQualityStore with the same
+    lookup interface. Records are decoded on first use and memoized.
+    The mapping stays valid after the file is replaced on disk, so a store
+    can keep serving while a newer one is built.
+    """
+
+    storage = "mmap"
+
+    def __init__(self, path: Path, expected_sha256: Optional[str] = None):
+        if sys.byteorder != "little":
+            raise WaterDatasetError("memory-mapped dataset requires a little-endian host")
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise WaterDatasetError(f"cannot map {path}: {e}") from e
+
+        buf = memoryview(self._mmap)
+        if len(buf) < HEADER.size + SECTION.size * len(SECTIONS):
+            raise WaterDatasetError(f"{path} is truncated")
+        magic, version, _, count, cell_deg, source = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise WaterDatasetError(f"{path} is not a water quality dataset")
+        if version != FORMAT_VERSION:
+            raise WaterDatasetError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+        self.source_sha256 = source.hex()
+        self.version = self.source_sha256[:12]
+        if expected_sha256 is not None and expected_sha256 != self.source_sha256:
+            raise WaterDatasetError(f"{path} was built from a different CSV (stale)")
+
+        sections = {
+            name: SECTION.unpack_from(buf, HEADER.size + i * SECTION.size)
+            for i, name in enumerate(SECTIONS)
+        }
+        if sections["records"][1] != count:
+            raise WaterDatasetError(f"{path} has {sections['records'][1]} records, header says {count}")
+        for name, (offset, length) in sections.items():
+            if offset + length * SECTION_ITEM_SIZES[name] > len(buf):
+                raise WaterDatasetError(f"{path} is truncated ({name} section)")
+
+        self._tables = _MappedTables(buf, sections)
+        self._count = count
+        self.names = MappedNameIndex(self._tables, count)
+        self.spatial = MappedGeoGridIndex(self._tables, count, cell_deg)
+        self._result = lru_cache(maxsize=4096)(self._decode)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def empty(self) -> bool:
+        return self._count == 0
+
+    def _decode(self, idx: int) -> Dict[str, Any]:
+        (city_off, city_len, state_off, state_len, source_off, source_len,
+         rel_off, rel_len, _lat, _lon, hardness, ph, tds, chlorine) = self._tables.row("records", RECORD, idx)
+        return {
+            "city": self._tables.string(city_off, city_len),
+            "state": self._tables.string(state_off, state_len),
+            "hardness_mg_l": hardness,
+            "ph": ph,
+            "tds_mg_l": tds,
+            "chlorine_mg_l": chlorine,
+            "source_type": self._tables.string(source_off, source_len),
+            "reliability": self._tables.string(rel_off, rel_len)
+        }
+
+    def city_name(self, idx: int) -> str:
+        return self._result(idx)["city"]
+
+    def match(self, idx: int, match_type: str, distance_km: float = 0.0) -> Dict[str, Any]:
+        """Response dict for a record (a fresh copy, so callers may mutate it)."""
+        return {
+            **self._result(idx),
+            "match_type": match_type,
+            "distance_km": distance_km,
+            "dataset_version": self.version
+        }
@@ -1,66 +1,193 @@
 """
-Water quality lookup service for Indian cities. 
+Water quality lookup service for Indian cities.
 Uses static CSV data with nearest-city fallback.
+
+The dataset is held in a compact, immutable WaterQualityStore: a tuple of
+__slots__ records with their response fields precomputed, plus name and
+spatial indexes. No pandas at runtime.
+
+When a prebuilt binary dataset (india_water_quality.gdwq, see
+water_dataset.py) sits next to the CSV and matches it, it is memory-mapped
+instead of parsing the CSV.
 """
 
-import pandas as pd
-from typing import Dict, Any, Optional
+import csv
+from typing import Dict, Any, Optional, Sequence, Tuple, Union
 from pathlib import Path
-import math
 import logging
+from ..spatial_index import GeoGridIndex
+from ..name_index import NameIndex
+from .water_dataset import MappedWaterQualityStore, WaterDatasetError, file_sha256
 
 logger = logging.getLogger(__name__)
 
+
+class WaterQualityRecord:
+    """One city's water quality row. `result` is the precomputed response payload."""
+
+    __slots__ = ("city", "state", "lat", "lon", "result")
+
+    def __init__(self, row: Dict[str, str]):
+        self.city = row['city']
+        self.state = row['state']
+        self.lat = float(row['lat'])
+        self.lon = float(row['lon'])
+        self.result: Dict[str, Any] = {
+            "city": self.city,
+            "state": self.state,
+            "hardness_mg_l": int(float(row['hardness_mg_l'])),
+            "ph": float(row['ph']),
+            "tds_mg_l": int(float(row['tds_mg_l'])),
+            "chlorine_mg_l": float(row['chlorine_mg_l']),
+            "source_type": row['source_type'],
+            "reliability": row['reliability']
+        }
+
+
+class WaterQualityStore:
+    """
+    Immutable water quality dataset with its lookup indexes.
+    Safe to share across concurrent requests: nothing is mutated after
+    construction (the name index only memoizes its own resolutions).
+    """
+
+    __slots__ = ("records", "names", "spatial", "version")
+
+    storage = "memory"
+
+    def __init__(self, records: Sequence[WaterQualityRecord], version: str = ""):
+        self.records: Tuple[WaterQualityRecord, ...] = tuple(records)
+        self.version = version
+        self.names = NameIndex([record.city for record in self.records])
+        self.spatial = GeoGridIndex([(record.lat, record.lon) for record in self.records])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def empty(self) -> bool:
+        return not self.records
+
+    def city_name(self, idx: int) -> str:
+        return self.records[idx].city
+
+    def match(self, idx: int, match_type: str, distance_km: float = 0.0) -> Dict[str, Any]:
+        """Response dict for a record (a fresh copy, so callers may mutate it)."""
+        return {
+            **self.records[idx].result,
+            "match_type": match_type,
+            "distance_km": distance_km,
+            "dataset_version": self.version
+        }
+
+
+AnyWaterStore = Union[WaterQualityStore, MappedWaterQualityStore]
+
 # Global cache for water quality data
-_WATER_DATA:  Optional[pd.DataFrame] = None
+_WATER_STORE: Optional[AnyWaterStore] = None
+
+
+def normalize_city(city: str) -> str:
+    """Clean city name (remove common suffixes)."""
+    city_clean = city.lower().strip()
+    return city_clean.replace(" city", "").replace(", india", "")
+
+
+def _dataset_path() -> Path:
+    primary = Path(__file__).resolve().parents[4] / "data" / "raw" / "india_water_quality.csv"
+
+    secondary = Path(__file__).resolve().parents[3] / "quality" / "india_water_quality.csv"
+
+    return primary if primary.exists() else secondary
+
+
+def binary_dataset_path(csv_path: Path) -> Path:
+    return csv_path.with_suffix(".gdwq")
+
+
+def dataset_version(source_sha256: str) -> str:
+    """Short, stable version id for a dataset: a prefix of the CSV's sha256."""
+    return source_sha256[:12]
+
+
+def read_water_quality_csv(csv_path: Path) -> WaterQualityStore:
+    """Parse the CSV into a store (no caching)."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        records = [WaterQualityRecord(row) for row in csv.DictReader(f)]
+    return WaterQualityStore(records, version=dataset_version(file_sha256(csv_path)))
 
 
-def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+def open_binary_dataset(csv_path: Path) -> Optional[MappedWaterQualityStore]:
     """
-    Calculate distance between two points on Earth (in km).
-    Uses Haversine formula. 
+    Map the prebuilt binary dataset for csv_path, or None if it is missing,
+    invalid or was built from a different CSV.
     """
-    R = 6371  # Earth radius in km
-    
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-    
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2)
-    c = 2 * math. atan2(math.sqrt(a), math.sqrt(1 - a))
-    
-    return R * c
-
-
-def load_water_quality_data() -> pd.DataFrame:
+    binary_path = binary_dataset_path(csv_path)
+    if not binary_path.exists():
+        return None
+    try:
+        return MappedWaterQualityStore(binary_path, expected_sha256=file_sha256(csv_path))
+    except WaterDatasetError as e:
+        logger.warning(f"Ignoring binary water quality dataset: {e}")
+        return None
+
+
+def build_water_store(csv_path: Optional[Path] = None) -> AnyWaterStore:
+    """
+    Build a fresh store for the current dataset files (no caching), preferring
+    the binary dataset. Raises if the CSV is missing or unreadable.
+    """
+    csv_path = csv_path or _dataset_path()
+    if not csv_path.exists():
+        raise FileNotFoundError(f"Water quality CSV not found at {csv_path}")
+
+    mapped = open_binary_dataset(csv_path)
+    if mapped is not None:
+        return mapped
+    return read_water_quality_csv(csv_path)
+
+
+def dataset_fingerprint(csv_path: Optional[Path] = None) -> Tuple:
+    """Cheap change detector for the dataset files: (mtime_ns, size) per file."""
+    csv_path = csv_path or _dataset_path()
+    fingerprint = []
+    for path in (csv_path, binary_dataset_path(csv_path)):
+        try:
+            stat = path.stat()
+            fingerprint.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+def swap_water_store(store: AnyWaterStore) -> Optional[AnyWaterStore]:
+    """
+    Publish a new store and return the previous one. Rebinding the global is
+    atomic; lookups already holding the old store finish against it.
+    """
+    global _WATER_STORE
+    previous, _WATER_STORE = _WATER_STORE, store
+    return previous
+
+
+def load_water_quality_data() -> AnyWaterStore:
     """
-    Load water quality CSV data into memory.
+    Load water quality data, preferring the memory-mapped binary dataset.
     Called once at app startup.
     """
-    global _WATER_DATA
-    
-    if _WATER_DATA is not None:
-        return _WATER_DATA
-    
-    primary = Path(__file__).resolve().parents[4] / "data" / "raw" / "india_water_quality.csv"
+    global _WATER_STORE
 
-    secondary = Path(__file__).resolve().parents[3] / "quality" / "india_water_quality.csv"
+    if _WATER_STORE is not None:
+        return _WATER_STORE
 
-    csv_path = primary if primary.exists() else secondary
-    
-    if not csv_path.exists():
-        logger.error(f"Water quality CSV not found at {csv_path}")
-        return pd.DataFrame()
-    
     try:
-        _WATER_DATA = pd.read_csv(csv_path)
-        logger.info(f"Loaded {len(_WATER_DATA)} cities from water quality database")
-        return _WATER_DATA
-    except Exception as e: 
+        _WATER_STORE = build_water_store()
+        logger.info(f"Loaded {len(_WATER_STORE)} cities from water quality database "
+                    f"(version {_WATER_STORE.version}, {_WATER_STORE.storage})")
+        return _WATER_STORE
+    except Exception as e:
         logger.error(f"Failed to load water quality data: {e}")
-        return pd.DataFrame()
+        return WaterQualityStore([])
 
 
 def lookup_water_quality(
@@ -71,18 +198,19 @@ def lookup_water_quality(
 ) -> Optional[Dict[str, Any]]:
     """
     Lookup water quality data for a city.
-    
+
     Strategy:
     1. Try exact city name match (case-insensitive)
-    2. If no match and coords provided, find nearest city within max_distance_km
-    3. Return None if no match found
-    
+    2. Try partial name match (substring, then whole-word run)
+    3. If no match and coords provided, find nearest city within max_distance_km
+    4. Return None if no match found
+
     Args:
         city: City name (e.g., "Mumbai", "New Delhi")
         lat: Optional latitude for nearest-city fallback
         lon: Optional longitude for nearest-city fallback
         max_distance_km: Maximum distance for nearest-city match
-        
+
     Returns:
         Dict with water quality data or None
         {
@@ -94,79 +222,34 @@ def lookup_water_quality(
             "source_type": "surface",
             "reliability": "high",
             "match_type": "exact" | "nearest" | "state_avg",
-            "distance_km": 0.0 (for nearest matches)
+            "distance_km": 0.0 (for nearest matches),
+            "dataset_version": "3f1c9a0b7d2e"
         }
     """
-    df = load_water_quality_data()
-    
-    if df.empty:
+    # Read the global once: a concurrent reload swaps the reference, and this
+    # lookup keeps using the version it started with
+    store = load_water_quality_data()
+
+    if store.empty:
         logger.warning("Water quality database is empty")
         return None
-    
-    # Clean city name (remove common suffixes)
-    city_clean = city.lower().strip()
-    city_clean = city_clean.replace(" city", "").replace(", india", "")
-    
-    # Strategy 1: Exact match (case-insensitive)
-    exact_match = df[df['city'].str.lower() == city_clean]
-    
-    if not exact_match.empty:
-        row = exact_match.iloc[0]
-        return {
-            "city": row['city'],
-            "state": row['state'],
-            "hardness_mg_l": int(row['hardness_mg_l']),
-            "ph": float(row['ph']),
-            "tds_mg_l": int(row['tds_mg_l']),
-            "chlorine_mg_l": float(row['chlorine_mg_l']),
-            "source_type": row['source_type'],
-            "reliability": row['reliability'],
-            "match_type":  "exact",
-            "distance_km": 0.0
-        }
-    
-    # Strategy 2: Partial match (e.g., "New Delhi" matches "Delhi")
-    partial_match = df[df['city'].str.lower().str.contains(city_clean, na=False)]
-    
-    if not partial_match.empty:
-        row = partial_match.iloc[0]
-        return {
-            "city":  row['city'],
-            "state": row['state'],
-            "hardness_mg_l": int(row['hardness_mg_l']),
-            "ph": float(row['ph']),
-            "tds_mg_l": int(row['tds_mg_l']),
-            "chlorine_mg_l": float(row['chlorine_mg_l']),
-            "source_type": row['source_type'],
-            "reliability": row['reliability'],
-            "match_type":  "partial",
-            "distance_km": 0.0
-        }
-    
+
+    # Strategies 1 & 2: exact, then partial name match
+    # (e.g. "Delhi" in "New Delhi", or "New Delhi" -> "Delhi"), via the name index
+    name_match = store.names.resolve(normalize_city(city))
+
+    if name_match is not None:
+        idx, match_type = name_match
+        return store.match(idx, match_type)
+
     # Strategy 3: Nearest city (if coordinates provided)
-    if lat is not None and lon is not None: 
-        df['distance'] = df.apply(
-            lambda row: _haversine_distance(lat, lon, row['lat'], row['lon']),
-            axis=1
-        )
-        
-        nearest = df.loc[df['distance'].idxmin()]
-        distance = nearest['distance']
-        
-        if distance <= max_distance_km: 
-            logger.info(f"Using nearest city {nearest['city']} ({distance:.1f} km from {city})")
-            return {
-                "city": nearest['city'],
-                "state": nearest['state'],
-                "hardness_mg_l": int(nearest['hardness_mg_l']),
-                "ph": float(nearest['ph']),
-                "tds_mg_l": int(nearest['tds_mg_l']),
-                "chlorine_mg_l": float(nearest['chlorine_mg_l']),
-                "source_type": nearest['source_type'],
-                "reliability": nearest['reliability'],
-                "match_type": "nearest",
-                "distance_km": round(distance, 1)
-            }
-    
+    if lat is not None and lon is not None:
+        matches = store.spatial.nearest(lat, lon, k=1, max_distance_km=max_distance_km)
+
+        if matches:
+            distance, idx = matches[0]
+            logger.info(f"Using nearest city {store.city_name(idx)} ({distance:.1f} km from {city})")
+            return store.match(idx, "nearest", round(distance, 1))
+
     logger.warning(f"No water quality data found for {city}")
-    return None
\ No newline at end of file
+    return None
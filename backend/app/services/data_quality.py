@@ -105,4 +105,9 @@ def validate_env_data(env_report: Dict[str, Any]) -> Dict[str, Any]:
         if aqi < 0 or aqi > 500:
             cleaned["aqi"] = None
     
-    return cleaned
\ No newline at end of file
+    return cleaned
+
+
+def degrade_confidence(confidence: str) -> str:
+    """One level lower: used when stages were cut short by the request deadline."""
+    return {"high": "medium", "medium": "low"}.get(confidence, "low")
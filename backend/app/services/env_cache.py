@@ -0,0 +1,46 @@
+"""
+Spatially bucketed cache for weather/UV and air-quality responses.
+Coordinates are quantized to a lat/lon grid cell, so "Mumbai", "mumbai city"
+and "Bombay" (which geocode a few hundred metres apart) share one entry.
+"""
+
+import math
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from ..config import settings
+from ..core.cache import StaleWhileRevalidateCache
+from ..core.singleflight import SingleFlight
+
+env_cache = StaleWhileRevalidateCache(
+    maxsize=settings.ENV_CACHE_SIZE,
+    stale_ttl=settings.ENV_CACHE_STALE_TTL
+)
+
+# Concurrent misses for the same (kind, grid cell) share one upstream call
+env_flights = SingleFlight("environment")
+
+
+def grid_cell(lat: float, lon: float, resolution_deg: Optional[float] = None) -> Tuple[int, int]:
+    """Quantize coordinates to the integer index of their grid cell."""
+    resolution = resolution_deg or settings.ENV_CACHE_GRID_DEG
+    return math.floor(lat / resolution), math.floor(lon / resolution)
+
+
+def cell_key(kind: str, lat: float, lon: float) -> Tuple[str, Tuple[int, int]]:
+    return kind, grid_cell(lat, lon)
+
+
+async def cached_by_cell(
+    kind: str,
+    lat: float,
+    lon: float,
+    fetch: Callable[[], Awaitable[Optional[Any]]],
+    ttl: float
+) -> Optional[Any]:
+    """
+    Return the cached value for (kind, grid cell), fetching on a miss.
+    Stale entries are returned immediately and refreshed in the background.
+    Concurrent misses for the same key are coalesced into one fetch.
+    """
+    key = cell_key(kind, lat, lon)
+    return await env_cache.get_or_fetch(key, lambda: env_flights.do(key, fetch), ttl)
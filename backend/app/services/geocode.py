@@ -1,17 +1,51 @@
-import httpx
 from typing import Dict, Any, Optional
 from ..config import settings
+from ..core.upstream import get_json
+from ..core.singleflight import SingleFlight
+from .geocode_cache import geocode_cache, normalize_place
+import logging
 
-# Nominatim requires a descriptive user-agent; include app name and optional contact
-DEFAULT_HEADERS = {
-    "User-Agent": f"{settings.APP_NAME} (contact: iamyashtiwari28@gmail.com)",
-    "Accept-Language": "en"
-}
+logger = logging.getLogger(__name__)
+
+# Concurrent lookups of the same place share one cache check + Nominatim call
+_flights = SingleFlight("geocode")
+
+class LocationNotFound(Exception):
+    """Nominatim answered, but had no match for the place."""
 
 async def geocode_place(place: str) -> Optional[Dict[str, Any]]:
     """
-    Query Nominatim (OpenStreetMap) to get lat/lon for a place string.
+    Resolve a place string to lat/lon, going through the geocode cache first.
     Returns dict { 'lat': float, 'lon': float, 'display_name': str } or None on failure.
+    Only "location not found" answers are negatively cached; transport
+    errors are never cached so the next request retries Nominatim.
+    """
+    key = normalize_place(place)
+    return await _flights.do(key, lambda: _geocode(key, place))
+
+
+async def _geocode(key: str, place: str) -> Optional[Dict[str, Any]]:
+    found, cached = await geocode_cache.get(key)
+    if found:
+        return cached
+
+    try:
+        result = await _query_nominatim(place)
+    except LocationNotFound:
+        await geocode_cache.set(key, None)
+        return None
+    except Exception as e:
+        logger.warning(f"Geocoding failed for '{place}': {e}")
+        return None
+
+    await geocode_cache.set(key, result)
+    return result
+
+
+async def _query_nominatim(place: str) -> Dict[str, Any]:
+    """
+    Query Nominatim (OpenStreetMap) to get lat/lon for a place string.
+    Raises LocationNotFound when there is no match, other exceptions on failure.
     """
     url = f"{settings.GEOCODE_BASE_URL}/search"
     params = {
@@ -20,20 +54,13 @@ async def geocode_place(place: str) -> Optional[Dict[str, Any]]:
         "limit": 1,
         "addressdetails": 1
     }
-    timeout = settings.HTTP_TIMEOUT
-    async with httpx.AsyncClient(timeout=timeout, headers=DEFAULT_HEADERS) as client:
-        try:
-            resp = await client.get(url, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            if not data:
-                return None
-            top = data[0]
-            return {
-                "lat": float(top.get("lat")),
-                "lon": float(top.get("lon")),
-                "display_name": top.get("display_name")
-            }
-        except Exception:
-            # In production, log the exception; for now return None
-            return None
\ No newline at end of file
+    # No hedging: Nominatim's usage policy forbids duplicate requests
+    data = await get_json("nominatim", url, params, hedge=False)
+    if not data:
+        raise LocationNotFound(place)
+    top = data[0]
+    return {
+        "lat": float(top.get("lat")),
+        "lon": float(top.get("lon")),
+        "display_name": top.get("display_name")
+    }
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Two-tier cache for geocoding results.
+Tier 1 is an in-process LRU, tier 2 is the `geocode_cache` Postgres table,
+which survives restarts and is shared by every worker. Expired rows are
+deleted by the cache pruner.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from ..config import settings
+from ..core.cache import TTLCache
+from ..db.session import AsyncSessionLocal
+from ..models.geocode_cache import GeocodeCacheEntry
+
+logger = logging.getLogger(__name__)
+
+_COUNTRY_SUFFIX = re.compile(r"(,\s*|\s+)india$")
+
+
+def normalize_place(place: str) -> str:
+    """
+    Normalize a place string into a cache key.
+    "  New  Delhi, India " -> "new delhi"
+    """
+    key = " ".join(place.lower().split())
+    key = _COUNTRY_SUFFIX.sub("", key).strip(" ,")
+    return key or place.lower().strip()
+
+
+class GeocodeCache:
+    """
+    Memory LRU in front of a persistent table.
+    A cached value of None is a negative entry ("location not found")
+    and is kept for GEOCODE_NEGATIVE_TTL seconds only.
+    """
+
+    def __init__(self):
+        self.memory = TTLCache(maxsize=settings.GEOCODE_CACHE_SIZE, ttl=settings.GEOCODE_CACHE_TTL)
+        self.db_hits = 0
+        self.db_misses = 0
+        self.db_errors = 0
+
+    async def get(self, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        found, value = self.memory.get(key)
+        if found:
+            return True, value
+        if not settings.GEOCODE_CACHE_PERSIST:
+            return False, None
+
+        try:
+            row = await self._db_get(key)
+        except Exception as e:
+            self.db_errors += 1
+            logger.warning(f"Geocode cache lookup failed for '{key}': {e}")
+            return False, None
+
+        if row is None:
+            self.db_misses += 1
+            return False, None
+
+        self.db_hits += 1
+        value, remaining = row
+        self.memory.set(key, value, ttl=remaining)
+        return True, value
+
+    async def set(self, key: str, value: Optional[Dict[str, Any]]) -> None:
+        ttl = settings.GEOCODE_CACHE_TTL if value is not None else settings.GEOCODE_NEGATIVE_TTL
+        self.memory.set(key, value, ttl=ttl)
+        if not settings.GEOCODE_CACHE_PERSIST:
+            return
+        try:
+            await self._db_set(key, value, ttl)
+        except Exception as e:
+            self.db_errors += 1
+            logger.warning(f"Geocode cache write failed for '{key}': {e}")
+
+    async def _db_get(self, key: str) -> Optional[Tuple[Optional[Dict[str, Any]], float]]:
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            entry = await db.get(GeocodeCacheEntry, key)
+            if entry is None or entry.expires_at <= now:
+                return None
+            remaining = (entry.expires_at - now).total_seconds()
+            if not entry.found:
+                return None, remaining
+            return {
+                "lat": entry.lat,
+                "lon": entry.lon,
+                "display_name": entry.display_name
+            }, remaining
+
+    async def _db_set(self, key: str, value: Optional[Dict[str, Any]], ttl: float) -> None:
+        row = {
+            "key": key,
+            "found": value is not None,
+            "lat": value["lat"] if value else None,
+            "lon": value["lon"] if value else None,
+            "display_name": value["display_name"] if value else None,
+            "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        }
+        stmt = insert(GeocodeCacheEntry).values(**row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GeocodeCacheEntry.key],
+            set_={k: stmt.excluded[k] for k in ("found", "lat", "lon", "display_name", "expires_at")}
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.db_hits
+        return {
+            "memory": memory,
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses,
+            "db_errors": self.db_errors,
+            "hit_rate": round(hits / lookups, 3) if lookups else None
+        }
+
+
+geocode_cache = GeocodeCache()
@@ -0,0 +1,201 @@
+"""
+Rule-table heuristic risk engine.
+
+The rules that used to be an if-chain in get_fallback_analysis are data:
+every rule adds `delta` to a risk when `feature <op> threshold` holds.
+Chained thresholds on one feature (e.g. humidity < 30 -> +3, elif < 50 -> +1)
+are written as cumulative bands (< 50 -> +1, < 30 -> +2 more).
+
+Scores start at BASE_SCORE and are clamped to 1-10. Batches are evaluated
+with NumPy, one array operation per rule over all rows; below
+VECTORIZE_MIN_ROWS the same table is walked in plain Python, which is
+faster for a single request. Missing or None features use FEATURE_DEFAULTS.
+
+Used by the LLM fallback, mode="fast" requests and batch / bulk re-scoring.
+Check parity with the original rules: python -m app.scripts.check_heuristic_parity
+"""
+
+import logging
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Rule(NamedTuple):
+    risk: str
+    feature: str
+    op: str  # lt | ge | gt | eq
+    threshold: Any
+    delta: int
+
+
+BASE_SCORE = 5
+VECTORIZE_MIN_ROWS = 32
+MIN_SCORE, MAX_SCORE = 1, 10
+
+FEATURE_DEFAULTS: Dict[str, Any] = {
+    "humidity": 50,
+    "pm25": 50,
+    "uv_index": 5,
+    "water_hardness": 150,
+    "skin_type": "normal",
+}
+NUMERIC_FEATURES = ("humidity", "pm25", "uv_index", "water_hardness")
+
+RISKS: Dict[str, Tuple[str, ...]] = {
+    "skin": ("dryness", "acne", "irritation", "uv_damage", "pigmentation"),
+    "hair": ("hairfall", "dandruff"),
+}
+
+RULES: Dict[str, Tuple[Rule, ...]] = {
+    "skin": (
+        Rule("dryness", "humidity", "lt", 50, 1),
+        Rule("dryness", "humidity", "lt", 30, 2),
+        Rule("dryness", "pm25", "gt", 100, 1),
+        Rule("dryness", "skin_type", "eq", "dry", 2),
+        Rule("dryness", "skin_type", "eq", "oily", -2),
+
+        Rule("acne", "humidity", "gt", 70, 2),
+        Rule("acne", "pm25", "gt", 100, 1),
+        Rule("acne", "skin_type", "eq", "oily", 2),
+        Rule("acne", "skin_type", "eq", "dry", -2),
+
+        Rule("irritation", "pm25", "gt", 150, 2),
+        Rule("irritation", "water_hardness", "gt", 250, 1),
+        Rule("irritation", "skin_type", "eq", "sensitive", 2),
+
+        Rule("uv_damage", "uv_index", "ge", 3, 1),
+        Rule("uv_damage", "uv_index", "ge", 6, 1),
+        Rule("uv_damage", "uv_index", "ge", 8, 2),
+        Rule("uv_damage", "skin_type", "eq", "sensitive", 1),
+
+        Rule("pigmentation", "uv_index", "ge", 8, 2),
+        Rule("pigmentation", "pm25", "gt", 150, 1),
+        Rule("pigmentation", "skin_type", "eq", "sensitive", 1),
+    ),
+    "hair": (
+        Rule("hairfall", "water_hardness", "gt", 200, 1),
+        Rule("hairfall", "water_hardness", "gt", 300, 2),
+        Rule("hairfall", "pm25", "gt", 100, 1),
+
+        Rule("dandruff", "humidity", "lt", 50, 1),
+        Rule("dandruff", "humidity", "lt", 30, 2),
+        Rule("dandruff", "water_hardness", "gt", 250, 2),
+    ),
+}
+
+RECOMMENDATIONS: Dict[str, List[str]] = {
+    "skin": [
+        "Use a moisturizer suitable for your skin type",
+        "Apply broad-spectrum SPF 30+ sunscreen daily",
+        "Cleanse your face twice daily with a gentle cleanser",
+        "Stay hydrated by drinking plenty of water",
+        "Avoid touching your face frequently",
+        "Use products with antioxidants for pollution protection",
+        "Keep your skincare routine simple while traveling",
+        "Pack travel-sized products for convenience"
+    ],
+    "hair": [
+        "Use a sulfate-free shampoo to protect hair",
+        "Apply conditioner to mid-lengths and ends",
+        "Limit washing to 2-3 times per week",
+        "Use a wide-tooth comb on wet hair",
+        "Avoid excessive heat styling",
+        "Consider a clarifying shampoo if water is hard",
+        "Apply leave-in conditioner for protection",
+        "Pack a travel-sized dry shampoo"
+    ],
+}
+
+EXPLANATIONS = {
+    'why': [
+        "Environmental conditions analyzed based on temperature, humidity, and air quality",
+        "Risk scores calculated using dermatological guidelines",
+        "Recommendations tailored to your profile and travel duration"
+    ]
+}
+
+
+_COMPARE = {
+    "lt": lambda value, threshold: value < threshold,
+    "ge": lambda value, threshold: value >= threshold,
+    "gt": lambda value, threshold: value > threshold,
+    "eq": lambda value, threshold: value == threshold,
+}
+
+
+def _numpy():
+    # Imported on first use: numpy is a noticeable part of a cold start
+    import numpy
+    return numpy
+
+
+def _feature(row: Dict[str, Any], profile: Dict[str, Any], name: str) -> Any:
+    source = profile if name == "skin_type" else row
+    value = source.get(name)
+    return FEATURE_DEFAULTS[name] if value is None else value
+
+
+def _score_group(rows: Sequence[Dict[str, Any]], profiles: Sequence[Dict[str, Any]], concern: str):
+    """Score rows that share a concern. Returns an (n, len(RISKS[concern])) int array."""
+    np = _numpy()
+    risks = RISKS[concern]
+    columns = {
+        name: np.array([_feature(row, profile, name) for row, profile in zip(rows, profiles)],
+                       dtype=float if name in NUMERIC_FEATURES else object)
+        for name in {rule.feature for rule in RULES[concern]}
+    }
+    scores = np.full((len(rows), len(risks)), BASE_SCORE, dtype=np.int64)
+    for rule in RULES[concern]:
+        mask = _COMPARE[rule.op](columns[rule.feature], rule.threshold)
+        scores[:, risks.index(rule.risk)] += rule.delta * mask.astype(np.int64)
+    return np.clip(scores, MIN_SCORE, MAX_SCORE)
+
+
+def score_row(env_data: Dict[str, Any], user_profile: Dict[str, Any]) -> Dict[str, int]:
+    """Risk scores for one (env, profile) pair, without NumPy."""
+    concern = _concern(user_profile)
+    scores = dict.fromkeys(RISKS[concern], BASE_SCORE)
+    for rule in RULES[concern]:
+        if _COMPARE[rule.op](_feature(env_data, user_profile, rule.feature), rule.threshold):
+            scores[rule.risk] += rule.delta
+    return {risk: max(MIN_SCORE, min(MAX_SCORE, score)) for risk, score in scores.items()}
+
+
+def score_batch(env_rows: Sequence[Dict[str, Any]], profiles: Sequence[Dict[str, Any]]) -> List[Dict[str, int]]:
+    """Risk scores for each (env, profile) pair, in input order."""
+    if len(env_rows) != len(profiles):
+        raise ValueError("env_rows and profiles must have the same length")
+    if len(env_rows) < VECTORIZE_MIN_ROWS:
+        return [score_row(row, profile) for row, profile in zip(env_rows, profiles)]
+
+    results: List[Dict[str, int]] = [{} for _ in env_rows]
+    for concern in RISKS:
+        indices = [i for i, profile in enumerate(profiles) if _concern(profile) == concern]
+        if not indices:
+            continue
+        scores = _score_group([env_rows[i] for i in indices], [profiles[i] for i in indices], concern)
+        for i, row_scores in zip(indices, scores.tolist()):
+            results[i] = dict(zip(RISKS[concern], row_scores))
+    return results
+
+
+def _concern(profile: Dict[str, Any]) -> str:
+    # Anything but "skin" is scored as hair, as the original rules did
+    return "skin" if profile.get("concern") == "skin" else "hair"
+
+
+def heuristic_analysis_batch(env_rows: Sequence[Dict[str, Any]], profiles: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Full analyses (risks, recommendations, explanations) in the LLM result shape."""
+    return [
+        {
+            'risks': risks,
+            'recommendations': list(RECOMMENDATIONS[_concern(profile)]),
+            'explanations': {'why': list(EXPLANATIONS['why'])}
+        }
+        for risks, profile in zip(score_batch(env_rows, profiles), profiles)
+    ]
+
+
+def heuristic_analysis(env_data: Dict[str, Any], user_profile: Dict[str, Any]) -> Dict[str, Any]:
+    return heuristic_analysis_batch([env_data], [user_profile])[0]
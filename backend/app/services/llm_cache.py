@@ -0,0 +1,164 @@
+"""
+Two-tier cache for LLM analysis results.
+Keys are a bucketed feature vector, so requests whose conditions fall in the
+same risk bands (and share a profile) reuse one Groq answer. Tier 1 is an
+in-process LRU, tier 2 is the `llm_cache` Postgres table, shared by every
+worker. Expired rows are deleted by the cache pruner.
+"""
+
+import copy
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from ..config import settings
+from ..core.cache import TTLCache
+from ..db.session import AsyncSessionLocal
+from ..models.llm_cache import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompt or result format changes, to orphan old entries
+KEY_VERSION = 1
+
+# Band edges per feature, and which side an exact edge value falls on.
+# bisect_right: an edge starts the upper band (humidity 30 is "30-50",
+# matching "< 30"); bisect_left: it ends the lower band (PM2.5 100 is
+# "35-100", matching "> 100").
+BANDS = {
+    "temperature_c": ((10, 20, 30, 35), bisect_right),
+    "humidity": ((30, 50, 70), bisect_right),
+    "pm25": ((35, 100, 150), bisect_left),
+    "uv_index": ((3, 6, 8, 11), bisect_right),
+    "water_hardness": ((60, 120, 180, 250, 300), bisect_left),
+}
+
+
+def feature_band(name: str, value: Any) -> str:
+    """The band a value falls in, e.g. humidity 42 -> "30-50"."""
+    if value is None:
+        return "na"
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return "na"
+    edges, side = BANDS[name]
+    index = side(edges, value)
+    if index == 0:
+        return f"<{edges[0]}"
+    if index == len(edges):
+        return f"{edges[-1]}+"
+    return f"{edges[index - 1]}-{edges[index]}"
+
+
+def llm_cache_key(env_data: Dict[str, Any], user_profile: Dict[str, Any], model: str) -> str:
+    """
+    Canonical key for an (environment, profile) pair.
+    "v1|openai/gpt-oss-20b|skin|dry|-|2-7d|temperature_c=30-35|humidity=50-70|..."
+    """
+    parts = [
+        f"v{KEY_VERSION}",
+        model,
+        user_profile.get("concern") or "-",
+        user_profile.get("skin_type") or "-",
+        user_profile.get("hair_type") or "-",
+        user_profile.get("duration_category") or "-",
+    ]
+    parts.extend(f"{name}={feature_band(name, env_data.get(name))}" for name in BANDS)
+    return "|".join(parts)
+
+
+class LLMResultCache:
+    """
+    Memory LRU in front of a persistent table. Only real LLM answers are
+    stored; heuristic fallbacks never are. Values are copied in and out,
+    so callers may mutate what they get.
+    """
+
+    def __init__(self):
+        self.memory = TTLCache(maxsize=settings.LLM_CACHE_SIZE, ttl=settings.LLM_CACHE_TTL)
+        self.db_hits = 0
+        self.db_misses = 0
+        self.db_errors = 0
+        self.stores = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not settings.LLM_CACHE_ENABLED:
+            return None
+        found, value = self.memory.get(key)
+        if found:
+            return copy.deepcopy(value)
+        if not settings.LLM_CACHE_PERSIST:
+            return None
+
+        try:
+            row = await self._db_get(key)
+        except Exception as e:
+            self.db_errors += 1
+            logger.warning(f"LLM cache lookup failed for '{key}': {e}")
+            return None
+
+        if row is None:
+            self.db_misses += 1
+            return None
+
+        self.db_hits += 1
+        value, remaining = row
+        self.memory.set(key, value, ttl=remaining)
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        if not settings.LLM_CACHE_ENABLED:
+            return
+        value = copy.deepcopy(value)
+        self.memory.set(key, value)
+        self.stores += 1
+        if not settings.LLM_CACHE_PERSIST:
+            return
+        try:
+            await self._db_set(key, value, settings.LLM_CACHE_TTL)
+        except Exception as e:
+            self.db_errors += 1
+            logger.warning(f"LLM cache write failed for '{key}': {e}")
+
+    async def _db_get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            entry = await db.get(LLMCacheEntry, key)
+            if entry is None or entry.expires_at <= now:
+                return None
+            return entry.result, (entry.expires_at - now).total_seconds()
+
+    async def _db_set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        stmt = insert(LLMCacheEntry).values(
+            key=key,
+            result=value,
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[LLMCacheEntry.key],
+            set_={k: stmt.excluded[k] for k in ("result", "expires_at")}
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.db_hits
+        return {
+            "enabled": settings.LLM_CACHE_ENABLED,
+            "memory": memory,
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses,
+            "db_errors": self.db_errors,
+            "stores": self.stores,
+            "hit_rate": round(hits / lookups, 3) if lookups else None
+        }
+
+
+llm_cache = LLMResultCache()
@@ -3,25 +3,119 @@ LLM Service using Groq API (FREE, no credit card needed!)
 Analyzes environmental data and generates risk scores + recommendations. 
 """
 
-from groq import Groq
+import asyncio
 import json
 import os
 import logging
+from contextlib import aclosing, asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional, Tuple
 from ..config import settings
+from ..core.deadline import deadline_expired, mark_cut, time_left
+from ..core.json_stream import ITEM, MEMBER, IncrementalJSONParser
+from ..core.metrics import LLM_FALLBACKS
+from ..core.singleflight import SingleFlight
+from .heuristics import heuristic_analysis
+from .llm_cache import llm_cache, llm_cache_key
+
+if TYPE_CHECKING:
+    from groq import AsyncGroq
 
 logger = logging.getLogger(__name__)
 
-# Initialize Groq client
-client = Groq(api_key=settings.GROQ_API_KEY)
+# Groq client (async, so LLM calls never block the event loop). The SDK is
+# slow to import, so it is loaded on the first LLM call, not at startup.
+_client: Optional["AsyncGroq"] = None
+
+
+def get_client() -> "AsyncGroq":
+    global _client
+    if _client is None:
+        from groq import AsyncGroq
+        _client = AsyncGroq(api_key=settings.GROQ_API_KEY)
+    return _client
+
+def _model() -> str:
+    return os.getenv("GROQ_MODEL", "openai/gpt-oss-20b")
+
+SYSTEM_PROMPT = "You are a dermatologist providing environmental skin/hair care analysis. Always respond with valid JSON only, no markdown formatting."
 
+# Top-level members of the LLM answer. A streamed answer is usable once the
+# required ones are complete; once all expected ones are, the stream is closed
+# so nothing after them is generated (or billed).
+REQUIRED_MEMBERS = ("risks", "recommendations")
+EXPECTED_MEMBERS = ("risks", "recommendations", "explanations")
 
-def analyze_with_llm(env_data:  dict, user_profile: dict) -> dict:
+
+class LLMResponseError(Exception):
+    """The completion ended without the required structure."""
+
+
+class _LLMLimiter:
+    """
+    Caps concurrent Groq calls per worker and keeps queue-depth counters.
+    Requests beyond the cap wait for a slot instead of piling onto the API.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.early_stops = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "early_stops": self.early_stops
+        }
+
+
+llm_limiter = _LLMLimiter(settings.LLM_MAX_CONCURRENCY)
+
+# Concurrent requests with the same cache key share one completion
+llm_flights = SingleFlight("llm")
+
+
+def get_llm_queue_stats() -> Dict[str, Any]:
+    return llm_limiter.stats()
+
+
+async def analyze_with_llm(env_data:  dict, user_profile: dict) -> dict:
     """
     Use Groq LLM to analyze environmental data and generate: 
     - Risk scores (1-10)
     - Recommendations
     - Explanations
     
+    Waiting for a concurrency slot counts against the LLM_TIMEOUT deadline
+    (or the request deadline, if sooner); on timeout or any error the
+    heuristic fallback is returned.
+    Successful answers are cached by bucketed conditions (see llm_cache).
+    With LLM_STREAMING the completion is streamed and cut off as soon as
+    the answer is complete (see stream_llm_analysis).
+    
     Args:
         env_data: Environmental data (temp, humidity, PM2.5, etc.)
         user_profile: User info (concern, skin_type, hair_type, duration)
@@ -29,7 +123,250 @@ def analyze_with_llm(env_data:  dict, user_profile: dict) -> dict:
     Returns:
         dict with risks, recommendations, explanations
     """
+    if settings.LLM_STREAMING:
+        async with aclosing(stream_llm_analysis(env_data, user_profile)) as events:
+            async for kind, value in events:
+                if kind == "result":
+                    return value
+
+    cache_key = llm_cache_key(env_data, user_profile, _model())
+    cached = await llm_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"LLM cache hit: {cache_key}")
+        return cached
+
+    prompt = build_prompt(env_data, user_profile)
+
+    try:
+        # Each caller waits only as long as its own deadline allows
+        return await asyncio.wait_for(
+            llm_flights.do(cache_key, lambda: _llm_result(cache_key, prompt, env_data)),
+            timeout=time_left(settings.LLM_TIMEOUT)
+        )
+        
+    except asyncio.TimeoutError as e:
+        return get_fallback_analysis(env_data, user_profile, _log_llm_failure(e))
+        
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse LLM JSON response: {e}")
+        logger.error(f"Response content: {e.doc}")
+        return get_fallback_analysis(env_data, user_profile, "malformed_response")
+        
+    except LLMResponseError as e:
+        logger.warning(f"{e}, using fallback")
+        return get_fallback_analysis(env_data, user_profile, "malformed_response")
+        
+    except Exception as e: 
+        llm_limiter.errors += 1
+        logger.error(f"LLM Error: {e}")
+        return get_fallback_analysis(env_data, user_profile, "llm_error")
+
+
+async def _llm_result(cache_key: str, prompt: str, env_data: dict) -> dict:
+    """One non-streamed completion, parsed, normalized and cached. Raises on failure."""
+    content = await _complete(prompt)
+    logger.info(f"Groq response received: {len(content)} characters")
     
+    # Parse JSON
+    result = json.loads(content)
+    
+    # Validate structure
+    if 'risks' not in result or 'recommendations' not in result: 
+        raise LLMResponseError("LLM response missing required fields")
+    
+    result = normalize_llm_result(result, env_data)
+    logger.info(f"LLM analysis successful.  Risks: {result['risks']}")
+    await llm_cache.set(cache_key, result)
+    return result
+
+
+async def stream_llm_analysis(env_data: dict, user_profile: dict) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of analyze_with_llm. Yields, as the completion arrives:
+    - ("risks", dict) as soon as the risks object closes (scores normalized)
+    - ("recommendation", str) for each recommendation as it closes
+    - ("explanations", dict)
+    - ("result", dict): the full normalized result, always last
+
+    If the stream times out, fails or is malformed, yields ("fallback",
+    {"reason": ...}) followed by the heuristic fallback's risks,
+    recommendations and explanations, which replace anything sent before.
+
+    A cached answer is replayed as the same events without calling Groq.
+    While an identical completion is already in flight, this call waits
+    for it (see llm_flights) and replays its result the same way.
+    """
+    cache_key = llm_cache_key(env_data, user_profile, _model())
+    cached = await llm_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"LLM cache hit: {cache_key}")
+        yield "risks", cached["risks"]
+        for recommendation in cached["recommendations"]:
+            yield "recommendation", recommendation
+        yield "explanations", cached["explanations"]
+        yield "result", cached
+        return
+
+    prompt = build_prompt(env_data, user_profile)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def fetch() -> dict:
+        result = await _stream_events(prompt, env_data, queue)
+        await llm_cache.set(cache_key, result)
+        return result
+
+    async def produce() -> None:
+        try:
+            # A coalesced caller only receives the final result, not the
+            # leader's incremental events
+            result = await asyncio.wait_for(
+                llm_flights.do(cache_key, fetch),
+                timeout=time_left(settings.LLM_TIMEOUT)
+            )
+            await queue.put(("result", result))
+        except Exception as e:
+            await queue.put(("_error", e))
+
+    producer = asyncio.create_task(produce())
+    sent = set()
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "_error":
+                reason = _log_llm_failure(value)
+                break
+            if kind == "result":
+                if "risks" not in sent:
+                    yield "risks", value["risks"]
+                if "recommendation" not in sent:
+                    for recommendation in value["recommendations"]:
+                        yield "recommendation", recommendation
+                if "explanations" not in sent:
+                    yield "explanations", value["explanations"]
+                logger.info(f"LLM analysis successful.  Risks: {value['risks']}")
+                yield "result", value
+                return
+            sent.add(kind)
+            yield kind, value
+    finally:
+        # Also stops generation if the consumer goes away mid-stream
+        # (unless coalesced callers are still waiting for it)
+        producer.cancel()
+
+    fallback = get_fallback_analysis(env_data, user_profile, reason)
+    yield "fallback", {"reason": reason}
+    yield "risks", fallback["risks"]
+    for recommendation in fallback["recommendations"]:
+        yield "recommendation", recommendation
+    yield "explanations", fallback["explanations"]
+    yield "result", fallback
+
+
+def _log_llm_failure(error: BaseException) -> str:
+    """Count and log a failed completion; returns a short reason."""
+    if isinstance(error, asyncio.TimeoutError):
+        llm_limiter.timeouts += 1
+        if deadline_expired():
+            logger.error("LLM call cut off by the request deadline")
+            mark_cut("llm")
+        else:
+            logger.error(f"LLM call exceeded {settings.LLM_TIMEOUT}s deadline")
+        return "timeout"
+    if isinstance(error, (json.JSONDecodeError, LLMResponseError)):
+        logger.error(f"Malformed LLM stream: {error}")
+        return "malformed_response"
+    llm_limiter.errors += 1
+    logger.error(f"LLM Error: {error}")
+    return "llm_error"
+
+
+async def _stream_events(prompt: str, env_data: dict, queue: asyncio.Queue) -> dict:
+    """
+    Parse the streamed completion incrementally, queueing events as members
+    close. Returns the normalized result once the required members are in.
+    """
+    parser = IncrementalJSONParser()
+    risks = None
+    async with aclosing(_complete_stream(prompt)) as chunks:
+        async for delta in chunks:
+            for kind, key, value in parser.feed(delta):
+                if kind == ITEM and key == "recommendations":
+                    await queue.put(("recommendation", value))
+                elif kind == MEMBER and key == "risks":
+                    risks = normalize_risks(value)
+                    await queue.put(("risks", risks))
+                elif kind == MEMBER and key == "explanations":
+                    await queue.put(("explanations", value))
+            if parser.done or all(key in parser.members for key in EXPECTED_MEMBERS):
+                # Leaving the loop closes the stream: nothing more is generated
+                if not parser.done:
+                    llm_limiter.early_stops += 1
+                break
+
+    missing = [key for key in REQUIRED_MEMBERS if key not in parser.members]
+    if missing:
+        raise LLMResponseError(f"stream ended without {', '.join(missing)}")
+    llm_limiter.completed += 1
+    return normalize_llm_result({**parser.members, "risks": risks}, env_data)
+
+
+def _messages(prompt: str) -> list:
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role":  "user",
+            "content": prompt
+        }
+    ]
+
+
+async def _complete_stream(prompt: str) -> AsyncIterator[str]:
+    """Stream one chat completion inside a concurrency slot, yielding text deltas."""
+    async with llm_limiter.slot():
+        logger.info("Streaming Groq LLM analysis...")
+
+        # No response_format here: JSON mode can't be combined with streaming
+        # on every model, and the parser skips anything around the object
+        stream = await get_client().chat.completions.create(
+            model=_model(),
+            messages=_messages(prompt),
+            temperature=0.3,
+            max_tokens=1500,
+            stream=True
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the response early stops generation
+            await stream.close()
+
+
+async def _complete(prompt: str) -> str:
+    """Run one chat completion inside a concurrency slot."""
+    async with llm_limiter.slot():
+        logger.info("Calling Groq LLM for analysis...")
+        
+        # Call Groq API
+        response = await get_client().chat.completions.create(
+            model=_model(),
+            messages=_messages(prompt),
+            temperature=0.3,  # Lower = more consistent
+            max_tokens=1500,
+            response_format={"type": "json_object"}  # Force JSON output
+        )
+        llm_limiter.completed += 1
+        
+        # Extract content
+        return response.choices[0].message.content
+
+
+def build_prompt(env_data: dict, user_profile: dict) -> str:
+    """Build the analysis prompt for a given environment and profile."""
     # Determine which risks to focus on
     if user_profile['concern'] == 'skin': 
         risk_focus = "dryness, acne, irritation, uv_damage, pigmentation"
@@ -104,217 +441,46 @@ Respond with ONLY valid JSON in this exact format:
 - Consider the duration of stay
 
 Output ONLY the JSON, no markdown formatting."""
+    return prompt
 
-    try:
-        logger.info("Calling Groq LLM for analysis...")
-        
-        # Call Groq API
-        response = client.chat.completions. create(
-            model=os.getenv("GROQ_MODEL", "openai/gpt-oss-20b"),
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a dermatologist providing environmental skin/hair care analysis. Always respond with valid JSON only, no markdown formatting."
-                },
-                {
-                    "role":  "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.3,  # Lower = more consistent
-            max_tokens=1500,
-            response_format={"type": "json_object"}  # Force JSON output
-        )
-        
-        # Extract content
-        content = response.choices[0].message.content
-        logger.info(f"Groq response received: {len(content)} characters")
-        
-        # Parse JSON
-        result = json.loads(content)
-        
-        # Validate structure
-        if 'risks' not in result or 'recommendations' not in result: 
-            logger.warning("LLM response missing required fields, using fallback")
-            return get_fallback_analysis(env_data, user_profile)
-        
-        # Ensure risks are integers and within 1-10 range
-        if 'risks' in result:
-            for key in result['risks']:
-                try:
-                    result['risks'][key] = int(round(float(result['risks'][key])))
-                    # Clamp to 1-10 range
-                    result['risks'][key] = max(1, min(10, result['risks'][key]))
-                except (ValueError, TypeError):
-                    logger.warning(f"Invalid risk value for {key}, using default")
-                    result['risks'][key] = 5
-        
-        # Ensure we have explanations
-        if 'explanations' not in result:
-            result['explanations'] = {
-                'why': [
-                    f"Analysis based on {env_data.get('city', 'location')} environmental conditions",
-                    f"Risk assessment considers temperature, humidity, and air quality",
-                    "Recommendations tailored to your profile and travel duration"
-                ]
-            }
-        
-        logger.info(f"LLM analysis successful.  Risks: {result['risks']}")
-        return result
-        
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse LLM JSON response: {e}")
-        logger.error(f"Response content: {content if 'content' in locals() else 'N/A'}")
-        return get_fallback_analysis(env_data, user_profile)
-        
-    except Exception as e: 
-        logger.error(f"LLM Error: {e}")
-        return get_fallback_analysis(env_data, user_profile)
 
+def normalize_risks(risks: dict) -> dict:
+    """Risk scores as integers clamped to 1-10 (5 when unparseable)."""
+    normalized = {}
+    for key, value in risks.items():
+        try:
+            # Clamp to 1-10 range
+            normalized[key] = max(1, min(10, int(round(float(value)))))
+        except (ValueError, TypeError):
+            logger.warning(f"Invalid risk value for {key}, using default")
+            normalized[key] = 5
+    return normalized
 
-def get_fallback_analysis(env_data: dict, user_profile: dict) -> dict:
-    """
-    Fallback heuristic analysis if LLM fails. 
-    Uses simple rule-based logic as backup.
-    """
-    logger.info("Using fallback heuristic analysis")
-    
-    concern = user_profile['concern']
-    
-    if concern == 'skin': 
-        # Simple heuristic calculations
-        humidity = env_data.get('humidity', 50)
-        pm25 = env_data.get('pm25', 50)
-        uv_index = env_data. get('uv_index', 5)
-        water_hardness = env_data.get('water_hardness', 150)
-        skin_type = user_profile.get('skin_type', 'normal')
-        
-        # Dryness calculation
-        dryness = 5
-        if humidity < 30:
-            dryness += 3
-        elif humidity < 50:
-            dryness += 1
-        if pm25 > 100:
-            dryness += 1
-        if skin_type == 'dry':
-            dryness += 2
-        elif skin_type == 'oily':
-            dryness -= 2
-        dryness = max(1, min(10, dryness))
-        
-        # Acne calculation
-        acne = 5
-        if humidity > 70:
-            acne += 2
-        if pm25 > 100:
-            acne += 1
-        if skin_type == 'oily':
-            acne += 2
-        elif skin_type == 'dry': 
-            acne -= 2
-        acne = max(1, min(10, acne))
-        
-        # Irritation calculation
-        irritation = 5
-        if pm25 > 150:
-            irritation += 2
-        if water_hardness > 250:
-            irritation += 1
-        if skin_type == 'sensitive':
-            irritation += 2
-        irritation = max(1, min(10, irritation))
-        
-        # UV damage calculation
-        uv_damage = 5
-        if uv_index >= 8:
-            uv_damage += 4
-        elif uv_index >= 6:
-            uv_damage += 2
-        elif uv_index >= 3:
-            uv_damage += 1
-        if skin_type == 'sensitive': 
-            uv_damage += 1
-        uv_damage = max(1, min(10, uv_damage))
-        
-        # Pigmentation calculation
-        pigmentation = 5
-        if uv_index >= 8:
-            pigmentation += 2
-        if pm25 > 150:
-            pigmentation += 1
-        if skin_type == 'sensitive':
-            pigmentation += 1
-        pigmentation = max(1, min(10, pigmentation))
-        
-        risks = {
-            'dryness': dryness,
-            'acne': acne,
-            'irritation': irritation,
-            'uv_damage': uv_damage,
-            'pigmentation': pigmentation
-        }
-        
-        recommendations = [
-            "Use a moisturizer suitable for your skin type",
-            "Apply broad-spectrum SPF 30+ sunscreen daily",
-            "Cleanse your face twice daily with a gentle cleanser",
-            "Stay hydrated by drinking plenty of water",
-            "Avoid touching your face frequently",
-            "Use products with antioxidants for pollution protection",
-            "Keep your skincare routine simple while traveling",
-            "Pack travel-sized products for convenience"
-        ]
-        
-    else:  # hair concern
-        humidity = env_data.get('humidity', 50)
-        pm25 = env_data.get('pm25', 50)
-        water_hardness = env_data. get('water_hardness', 150)
-        
-        # Hairfall calculation
-        hairfall = 5
-        if water_hardness > 300:
-            hairfall += 3
-        elif water_hardness > 200:
-            hairfall += 1
-        if pm25 > 100:
-            hairfall += 1
-        hairfall = max(1, min(10, hairfall))
-        
-        # Dandruff calculation
-        dandruff = 5
-        if humidity < 30:
-            dandruff += 3
-        elif humidity < 50:
-            dandruff += 1
-        if water_hardness > 250:
-            dandruff += 2
-        dandruff = max(1, min(10, dandruff))
-        
-        risks = {
-            'hairfall': hairfall,
-            'dandruff': dandruff
-        }
-        
-        recommendations = [
-            "Use a sulfate-free shampoo to protect hair",
-            "Apply conditioner to mid-lengths and ends",
-            "Limit washing to 2-3 times per week",
-            "Use a wide-tooth comb on wet hair",
-            "Avoid excessive heat styling",
-            "Consider a clarifying shampoo if water is hard",
-            "Apply leave-in conditioner for protection",
-            "Pack a travel-sized dry shampoo"
-        ]
+
+def normalize_llm_result(result: dict, env_data: dict) -> dict:
+    """Clamp risk scores to integers in 1-10 and fill in missing explanations."""
+    # Ensure risks are integers and within 1-10 range
+    if 'risks' in result:
+        result['risks'] = normalize_risks(result['risks'])
     
-    return {
-        'risks': risks,
-        'recommendations':  recommendations,
-        'explanations':  {
+    # Ensure we have explanations
+    if 'explanations' not in result:
+        result['explanations'] = {
             'why': [
-                f"Environmental conditions analyzed based on temperature, humidity, and air quality",
-                f"Risk scores calculated using dermatological guidelines",
+                f"Analysis based on {env_data.get('city', 'location')} environmental conditions",
+                f"Risk assessment considers temperature, humidity, and air quality",
                 "Recommendations tailored to your profile and travel duration"
             ]
         }
-    }
\ No newline at end of file
+    return result
+
+
+def get_fallback_analysis(env_data: dict, user_profile: dict, reason: str) -> dict:
+    """
+    Fallback heuristic analysis if LLM fails. 
+    Uses the rule table in heuristics.py as backup.
+    `reason` (timeout, malformed_response, llm_error) labels the fallback metric.
+    """
+    logger.info("Using fallback heuristic analysis")
+    LLM_FALLBACKS.labels(reason).inc()
+    return heuristic_analysis(env_data, user_profile)
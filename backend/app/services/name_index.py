@@ -0,0 +1,131 @@
+"""
+Immutable name index for place-name lookups.
+Built once from a list of names; resolves a query to the first matching
+name (in dataset order) without scanning the dataset.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# n-gram lengths indexed for substring search
+_GRAM_SIZES = (1, 2, 3)
+
+
+def _grams(text: str, n: int) -> set:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NameIndexBase:
+    """
+    - exact: normalized-name lookup
+    - substring: n-gram postings (1/2/3-grams) narrow candidates, which are
+      then verified with `in`; this keeps the old `str.contains` semantics
+    - token: a run of whole words in the query equals a name
+      ("new delhi" -> "delhi")
+
+    resolve() is memoized per normalized query.
+    Subclasses provide storage through _name(), _exact_lookup() and _posting().
+    """
+
+    def __init__(self, memo_size: int = 4096):
+        self.resolve = lru_cache(maxsize=memo_size)(self._resolve)
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _name(self, idx: int) -> str:
+        raise NotImplementedError
+
+    def _exact_lookup(self, name: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def _posting(self, gram: str) -> Optional[Sequence[int]]:
+        raise NotImplementedError
+
+    def exact(self, query: str) -> Optional[int]:
+        return self._exact_lookup(query)
+
+    def substring(self, query: str) -> Optional[int]:
+        """First name (dataset order) containing query."""
+        if not len(self):
+            return None
+        if not query:
+            return 0
+        n = min(len(query), _GRAM_SIZES[-1])
+        posting_lists = []
+        for gram in _grams(query, n):
+            ids = self._posting(gram)
+            if ids is None:
+                return None
+            posting_lists.append(ids)
+        posting_lists.sort(key=len)
+        candidates = set(posting_lists[0])
+        for ids in posting_lists[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                return None
+        for idx in sorted(candidates):
+            if query in self._name(idx):
+                return idx
+        return None
+
+    def token(self, query: str) -> Optional[int]:
+        """Longest run of whole query words that is itself a name."""
+        words = query.split()
+        for size in range(len(words) - 1, 0, -1):
+            runs = (" ".join(words[start:start + size]) for start in range(len(words) - size + 1))
+            matches = [idx for idx in map(self._exact_lookup, runs) if idx is not None]
+            if matches:
+                return min(matches)
+        return None
+
+    def _resolve(self, query: str) -> Optional[Tuple[int, str]]:
+        """(index, match_type) for a normalized query, or None."""
+        idx = self.exact(query)
+        if idx is not None:
+            return idx, "exact"
+        idx = self.substring(query)
+        if idx is None:
+            idx = self.token(query)
+        if idx is not None:
+            return idx, "partial"
+        return None
+
+
+class NameIndex(NameIndexBase):
+    """In-memory name index built from a list of names."""
+
+    def __init__(self, names: Sequence[str], memo_size: int = 4096):
+        super().__init__(memo_size)
+        self._names: Tuple[str, ...] = tuple(name.lower() for name in names)
+
+        exact: Dict[str, int] = {}
+        postings: Dict[str, List[int]] = {}
+        for idx, name in enumerate(self._names):
+            exact.setdefault(name, idx)
+            for n in _GRAM_SIZES:
+                for gram in _grams(name, n):
+                    postings.setdefault(gram, []).append(idx)
+
+        self._exact = exact
+        self._postings: Dict[str, Tuple[int, ...]] = {gram: tuple(ids) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _name(self, idx: int) -> str:
+        return self._names[idx]
+
+    def _exact_lookup(self, name: str) -> Optional[int]:
+        return self._exact.get(name)
+
+    def _posting(self, gram: str) -> Optional[Sequence[int]]:
+        return self._postings.get(gram)
+
+    def exact_entries(self) -> List[Tuple[str, int]]:
+        """(name, first index) pairs sorted by name."""
+        return sorted(self._exact.items())
+
+    def posting_entries(self) -> List[Tuple[str, Tuple[int, ...]]]:
+        """(gram, indices) pairs sorted by gram."""
+        return sorted(self._postings.items())
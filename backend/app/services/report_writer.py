@@ -0,0 +1,207 @@
+"""
+Write-behind persistence for Report rows.
+/api/analyze hands finished reports to an in-process bounded queue; a single
+background worker drains it and bulk-inserts batches, so response latency
+doesn't depend on Postgres commit latency. /api/analyze/batch queues its
+reports as one unit, which is written in a single insert unless a bad row
+forces a row-by-row retry.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+from ..core.metrics import ANALYZE_STAGE_SECONDS
+from ..db.session import AsyncSessionLocal
+from ..models.report import Report
+from .rollups import apply_report_rollups
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ReportWriter:
+    """
+    Bounded queue + batching worker.
+
+    - A batch is flushed when it reaches REPORT_BATCH_SIZE rows or
+      REPORT_FLUSH_INTERVAL seconds after its first row, whichever comes first.
+    - When the queue is full, submit() waits up to REPORT_ENQUEUE_TIMEOUT
+      for space (backpressure) and then drops the report.
+    - stop() drains everything still queued before returning.
+    - If a bulk insert fails, its rows are retried one at a time, so one
+      bad row doesn't take the rest of the batch with it.
+    """
+
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float, enqueue_timeout: float):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches = 0
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._worker = asyncio.create_task(self._run())
+        logger.info(f"Report writer started (queue={self.maxsize}, batch={self.batch_size}, interval={self.flush_interval}s)")
+
+    async def stop(self) -> None:
+        """Flush everything still queued, then stop the worker."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._worker
+        self._worker = None
+        logger.info(f"Report writer stopped ({self.written} written, {self.failed} failed, {self.dropped} dropped)")
+
+    async def submit(self, report: Report) -> bool:
+        """
+        Queue a report for persistence. Returns False if it was dropped.
+        Without a running worker (scripts, tests) the report is written inline.
+        """
+        if not self.running:
+            return await self._flush([report])
+        return await self._enqueue(report, 1, report.destination)
+
+    async def submit_many(self, reports: List[Report]) -> bool:
+        """
+        Queue reports that belong together: they stay in one batch, so they
+        land in a single bulk insert (or, if that fails, are retried row by
+        row). Returns False if dropped.
+        """
+        if not reports:
+            return True
+        if not self.running:
+            return await self._flush(list(reports))
+        return await self._enqueue(list(reports), len(reports), f"a batch of {len(reports)}")
+
+    async def _enqueue(self, item: Any, count: int, label: str) -> bool:
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(item), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += count
+                logger.error(f"Report queue full ({self.maxsize}); dropping report for {label}")
+                return False
+        self.enqueued += count
+        return True
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch: List[Report] = list(item) if isinstance(item, list) else [item]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, list):
+                    batch.extend(item)
+                else:
+                    batch.append(item)
+
+            await self._flush(batch)
+
+        # Drain anything that raced in behind the stop marker
+        leftover: List[Report] = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is _STOP:
+                continue
+            # submit_many() batches are never split
+            if isinstance(item, list):
+                await self._flush(item)
+            else:
+                leftover.append(item)
+        for start in range(0, len(leftover), self.batch_size):
+            await self._flush(leftover[start:start + self.batch_size])
+
+    async def _flush(self, batch: List[Report]) -> bool:
+        """
+        Bulk-insert a batch. If that fails, retry one row per transaction, so
+        a bad row only loses itself. Returns False if any row was lost.
+        """
+        try:
+            await self._insert(batch)
+            self.written += len(batch)
+            self.batches += 1
+            logger.info(f"Saved {len(batch)} report(s) to database")
+            return True
+        except Exception as e:
+            if len(batch) == 1:
+                self.failed += 1
+                logger.error(f"Failed to save report for {batch[0].destination} to database: {e}")
+                return False
+            logger.warning(f"Bulk insert of {len(batch)} reports failed ({e}); retrying one at a time")
+
+        saved = 0
+        for report in batch:
+            try:
+                await self._insert([report])
+                saved += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to save report for {report.destination} to database: {e}")
+        self.written += saved
+        self.batches += 1
+        logger.info(f"Saved {saved} of {len(batch)} report(s) to database")
+        return saved == len(batch)
+
+    async def _insert(self, batch: List[Report]) -> None:
+        # A failed transaction is rolled back when the session closes, which
+        # leaves its rows transient and ready to be added again
+        with ANALYZE_STAGE_SECONDS.labels("db_write").time():
+            async with AsyncSessionLocal() as db:
+                db.add_all(batch)
+                await db.flush()
+                # Stats rollups are updated in the same transaction as the insert
+                await apply_report_rollups(db, [report.id for report in batch])
+                await db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "dropped": self.dropped
+        }
+
+
+report_writer = ReportWriter(
+    maxsize=settings.REPORT_QUEUE_SIZE,
+    batch_size=settings.REPORT_BATCH_SIZE,
+    flush_interval=settings.REPORT_FLUSH_INTERVAL,
+    enqueue_timeout=settings.REPORT_ENQUEUE_TIMEOUT
+)
@@ -0,0 +1,71 @@
+"""
+Hourly stats rollups.
+Every inserted report adds +1 to its (hour, dimension, key) rows in
+`report_rollups`, in the same transaction as the insert, so the dashboard
+reads O(buckets) rows instead of scanning reports.
+"""
+
+from typing import List
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+ROLLUP_DIMENSIONS = ("total", "concern", "destination", "skin_type", "hair_type", "duration", "risk")
+
+# Aggregates the reports selected by {source} into rollup deltas and adds them
+# to the existing rows. Buckets are UTC hours regardless of session TimeZone.
+_ROLLUP_UPSERT = """
+INSERT INTO report_rollups (bucket_start, dimension, key, count, risk_sum, risk_count)
+SELECT bucket_start, dimension, key, sum(count), sum(risk_sum), sum(risk_count)
+FROM (
+    SELECT date_trunc('hour', src.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' AS bucket_start,
+           d.dimension, d.key, 1 AS count, 0.0 AS risk_sum, 0 AS risk_count
+    FROM ({source}) AS src,
+         LATERAL (VALUES ('total', ''),
+                         ('concern', src.concern),
+                         ('destination', src.destination),
+                         ('skin_type', src.skin_type),
+                         ('hair_type', src.hair_type),
+                         ('duration', src.duration_category)) AS d(dimension, key)
+    WHERE d.key IS NOT NULL
+    UNION ALL
+    SELECT date_trunc('hour', src.created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+           'risk', risk.key, 0, risk.value::numeric, 1
+    FROM ({source}) AS src, jsonb_each(src.risks) AS risk(key, value)
+    WHERE src.risks IS NOT NULL AND jsonb_typeof(risk.value) = 'number'
+) AS deltas
+GROUP BY bucket_start, dimension, key
+ON CONFLICT (bucket_start, dimension, key) DO UPDATE SET
+    count = report_rollups.count + EXCLUDED.count,
+    risk_sum = report_rollups.risk_sum + EXCLUDED.risk_sum,
+    risk_count = report_rollups.risk_count + EXCLUDED.risk_count
+"""
+
+INCREMENTAL_ROLLUP_SQL = text(_ROLLUP_UPSERT.format(
+    source="SELECT * FROM reports WHERE id = ANY(:ids)"
+))
+
+# Incremental writers hold this advisory lock shared (so they don't block
+# each other) for the rest of their transaction; a rebuild holds it
+# exclusively, so it sees every report whose rollups were already applied
+# and no increment lands between its delete and its re-insert
+ROLLUP_LOCK_KEY = 0x6765_6f64_726f_6c6c  # "geodroll"
+LOCK_ROLLUPS_SHARED_SQL = text(f"SELECT pg_advisory_xact_lock_shared({ROLLUP_LOCK_KEY})")
+LOCK_ROLLUPS_EXCLUSIVE_SQL = text(f"SELECT pg_advisory_xact_lock({ROLLUP_LOCK_KEY})")
+
+# Repair/backfill: rebuild every bucket at or after :since from raw reports
+DELETE_ROLLUPS_SINCE_SQL = text("DELETE FROM report_rollups WHERE bucket_start >= :since")
+REBUILD_ROLLUPS_SINCE_SQL = text(_ROLLUP_UPSERT.format(
+    source="SELECT * FROM reports WHERE created_at >= :since"
+))
+
+
+async def apply_report_rollups(db: AsyncSession, report_ids: List[uuid.UUID]) -> None:
+    """
+    Add freshly inserted reports to the hourly rollups.
+    Must run inside the transaction that inserted them (after a flush).
+    """
+    if report_ids:
+        await db.execute(LOCK_ROLLUPS_SHARED_SQL)
+        await db.execute(INCREMENTAL_ROLLUP_SQL, {"ids": report_ids})
@@ -0,0 +1,162 @@
+"""
+Immutable grid-bucket spatial index for nearest-point lookups.
+Points are bucketed into lat/lon cells once at build time; queries only
+measure haversine distance to points in the cells that can contain a match.
+"""
+
+import heapq
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Calculate distance between two points on Earth (in km).
+    Uses Haversine formula. 
+    """
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = (math.sin(delta_lat / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS_KM * c
+
+
+class GridIndexBase:
+    """
+    Query logic for grid-bucket indexes over a fixed list of (lat, lon) points.
+    Queries return (distance_km, point_index) pairs sorted by distance,
+    with ties broken by point index (i.e. dataset order).
+    Subclasses provide storage through _point() and _cell_members().
+    """
+
+    __slots__ = ("cell_deg", "_lat_cells", "_lon_cells")
+
+    def __init__(self, cell_deg: float):
+        self.cell_deg = cell_deg
+        self._lat_cells = int(math.ceil(180.0 / cell_deg))
+        self._lon_cells = int(math.ceil(360.0 / cell_deg))
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _point(self, idx: int) -> Tuple[float, float]:
+        raise NotImplementedError
+
+    def _cell_members(self, cell: Tuple[int, int]) -> Sequence[int]:
+        raise NotImplementedError
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        i = min(int((lat + 90.0) // self.cell_deg), self._lat_cells - 1)
+        j = int(((lon + 180.0) % 360.0) // self.cell_deg)
+        return i, j
+
+    def _ring(self, center: Tuple[int, int], ring: int):
+        """Yield the cells in the square ring `ring` cells away from center."""
+        ci, cj = center
+        for i in range(ci - ring, ci + ring + 1):
+            if i < 0 or i >= self._lat_cells:
+                continue
+            edge = i in (ci - ring, ci + ring)
+            cols = range(cj - ring, cj + ring + 1) if edge else (cj - ring, cj + ring)
+            for j in cols:
+                yield i, j % self._lon_cells
+
+    def _ring_lower_bound_km(self, lat: float, ring: int) -> float:
+        """
+        Lower bound on the distance to any point outside the first `ring`
+        rings. Longitude cells shrink towards the poles, so use the most
+        poleward latitude the next ring can reach.
+        """
+        span = ring * self.cell_deg
+        poleward = min(89.999, abs(lat) + span + self.cell_deg)
+        return span * KM_PER_DEGREE * math.cos(math.radians(poleward))
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 1,
+        max_distance_km: Optional[float] = None
+    ) -> List[Tuple[float, int]]:
+        """k nearest points, optionally limited to max_distance_km."""
+        if not len(self) or k <= 0:
+            return []
+        center = self._cell(lat, lon)
+        best: List[Tuple[float, int]] = []  # max-heap of (-distance, -index)
+        max_ring = max(self._lat_cells, self._lon_cells)
+        # Wide rings wrap around in longitude; never visit a cell twice
+        visited = set()
+
+        for ring in range(max_ring + 1):
+            candidates = []
+            for cell in self._ring(center, ring):
+                if cell not in visited:
+                    visited.add(cell)
+                    candidates.extend(self._cell_members(cell))
+            for idx in candidates:
+                p_lat, p_lon = self._point(idx)
+                distance = haversine_km(lat, lon, p_lat, p_lon)
+                if max_distance_km is not None and distance > max_distance_km:
+                    continue
+                item = (-distance, -idx)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+
+            bound = self._ring_lower_bound_km(lat, ring)
+            if max_distance_km is not None and bound > max_distance_km:
+                break
+            if len(best) == k and bound > -best[0][0]:
+                break
+
+        return sorted((-d, -i) for d, i in best)
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, int]]:
+        """All points within radius_km, nearest first."""
+        return self.nearest(lat, lon, k=len(self), max_distance_km=radius_km)
+
+
+class GeoGridIndex(GridIndexBase):
+    """
+    In-memory grid index. Nothing is mutated after __init__, so it is
+    safe to share across concurrent requests and threads.
+    """
+
+    __slots__ = ("_points", "_cells")
+
+    def __init__(self, points: Sequence[Tuple[float, float]], cell_deg: float = 0.5):
+        super().__init__(cell_deg)
+        self._points: Tuple[Tuple[float, float], ...] = tuple((float(lat), float(lon)) for lat, lon in points)
+
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        for idx, (lat, lon) in enumerate(self._points):
+            cells.setdefault(self._cell(lat, lon), []).append(idx)
+        self._cells: Dict[Tuple[int, int], Tuple[int, ...]] = {
+            cell: tuple(indices) for cell, indices in cells.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _point(self, idx: int) -> Tuple[float, float]:
+        return self._points[idx]
+
+    def _cell_members(self, cell: Tuple[int, int]) -> Sequence[int]:
+        return self._cells.get(cell, ())
+
+    def cell_key(self, cell: Tuple[int, int]) -> int:
+        """Flatten a cell to a single integer (row-major)."""
+        return cell[0] * self._lon_cells + cell[1]
+
+    def cells(self) -> List[Tuple[int, Tuple[int, ...]]]:
+        """(cell_key, point indices) for every non-empty cell, sorted by key."""
+        return sorted((self.cell_key(cell), indices) for cell, indices in self._cells.items())
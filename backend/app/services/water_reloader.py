@@ -0,0 +1,108 @@
+"""
+Hot reload of the water quality dataset.
+
+A background task polls the dataset files' (mtime, size). When they change,
+the new store is built in a worker thread, off the request path, and then
+published with swap_water_store(). Lookups already running keep the store
+they started with, so there is no restart and no lock on the hot path.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.services.clients.water_quality import (
+    build_water_store,
+    dataset_fingerprint,
+    load_water_quality_data,
+    swap_water_store,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class WaterDatasetReloader:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._fingerprint = None
+        self.loaded_at: Optional[datetime] = None
+        self.checks = 0
+        self.reloads = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    async def start(self) -> None:
+        """Record the loaded dataset and, if enabled, start watching it."""
+        load_water_quality_data()
+        self._fingerprint = dataset_fingerprint()
+        self.loaded_at = datetime.now(timezone.utc)
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="water-dataset-reloader")
+            logger.info(f"Watching water quality dataset for changes every {self.interval:g}s")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check_now()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                logger.error(f"Water quality dataset reload failed: {e}")
+
+    async def check_now(self) -> bool:
+        """Reload if the dataset files changed. Returns True if a new store was published."""
+        async with self._lock:
+            self.checks += 1
+            fingerprint = await asyncio.to_thread(dataset_fingerprint)
+            if fingerprint == self._fingerprint:
+                return False
+
+            current = load_water_quality_data()
+            store = await asyncio.to_thread(build_water_store)
+            self._fingerprint = fingerprint
+            if store.version == current.version and store.storage == current.storage:
+                # Touched or rewritten with identical content
+                return False
+
+            swap_water_store(store)
+            self.reloads += 1
+            self.loaded_at = datetime.now(timezone.utc)
+            logger.info(f"Reloaded water quality dataset: {current.version or 'none'} -> "
+                        f"{store.version} ({len(store)} cities, {store.storage})")
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        store = load_water_quality_data()
+        return {
+            "version": store.version or None,
+            "storage": store.storage,
+            "cities": len(store),
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "watching": self._task is not None,
+            "checks": self.checks,
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+def current_water_dataset_version() -> Optional[str]:
+    return load_water_quality_data().version or None
+
+
+water_reloader = WaterDatasetReloader(interval=settings.WATER_RELOAD_INTERVAL)